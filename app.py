@@ -1,16 +1,27 @@
-import io
+import time
+
+# Start of the app import, for the startup timings
+IMPORT_STARTED = time.perf_counter()
+
+import contextlib
+import functools
+import logging
+import os
 
 # Dash imports: Essential components for creating the Dash web application
-from dash import Dash, dcc, html, Input, Output, _dash_renderer, callback_context, State, exceptions
+from dash import Dash, dcc, html, Input, Output, _dash_renderer, callback_context, State, exceptions, no_update, Patch
+from flask import jsonify
 
 
 # Backend imports: Data setup logic from the backend module
 from backend.data_setup import setup_data
-import utils.export_variables as variables
+from utils.session_store import SessionStore
+from utils.background_jobs import background_callback_manager, csv_with_progress, heavy_callback
 from utils.logic_functions import parse_table_data
+from utils.downsampling import DEFAULT_GRAPH_WIDTH, relayout_x_range
+from utils.figure_cache import cache_key, figure_cache, frame_digest
 
-# External libraries: Libraries for data visualization (Plotly) and handling data (pandas)
-import plotly.graph_objects as go
+# External libraries: Libraries for handling data (pandas) and UI components (Mantine)
 import pandas as pd
 import dash_mantine_components as dmc
 
@@ -18,8 +29,8 @@ import dash_mantine_components as dmc
 _dash_renderer._set_react_version("18.2.0")
 
 # Components: Import custom components for graphs, tables, and buttons
-from components.graph_components import main_graph, spread_graph
-from components.table_components import main_table
+from components.graph_components import USER_PREDICTION_TRACE, main_graph, spread_graph
+from components.table_components import last_day_predictions, main_table, user_prediction_row
 from components.button_components import last_day_toggle, table_slider
 
 # Initialize the Dash app
@@ -32,10 +43,28 @@ external_scripts = [
     "https://cdn.tailwindcss.com"  # Tailwind CSS for utility-first styling
 ]
 
-# Set up the data by calling the setup_data function
-client =  setup_data()
+logger = logging.getLogger(__name__)
+if __name__ == "__main__":
+    # Show the startup timings when run directly (under gunicorn its own logging configuration applies)
+    logging.basicConfig(level=logging.INFO)
+
+# Every browser session gets its own Ops object, starting from the data set up by setup_data (fetched once and,
+# with DASHBOARD_SESSION_CACHE_DIR set, shared by all worker processes). The data is loaded in the background
+# so the app can serve its layout right away; the graphs are drawn once it is ready.
+# Set DASHBOARD_COMPACT_STORAGE=1 to hold the data as float32 instead of float64, which halves the memory each
+# session takes.
+COMPACT_STORAGE = os.environ.get("DASHBOARD_COMPACT_STORAGE", "0") == "1"
+session_store = SessionStore(functools.partial(setup_data, compact=COMPACT_STORAGE))
+session_store.start_loading()
+# Hours published after the load are added every DASHBOARD_REFRESH_SECONDS (see SessionStore.refresh)
+session_store.start_refreshing()
 
+# How often browsers check for a new data_version while the data is loading, and once it is loaded
+DATA_LOADING_POLL_MS = 1000
+DATA_REFRESH_POLL_MS = 30 * 1000
 
+# Seconds from the start of the import until the app was imported, and until the data was first ready
+STARTUP_TIMINGS = {"import_seconds": None, "first_data_seconds": None}
 
 # Initialize the Dash web application
 app = Dash(
@@ -43,163 +72,382 @@ app = Dash(
     external_scripts=external_scripts,
     external_stylesheets=external_stylesheets,
     meta_tags=[{"name": "viewport", "content": "width=device-width, initial-scale=1"}],  # Responsive design
+    # Runs the heavy callbacks (see heavy_callback) in worker processes when diskcache is installed
+    background_callback_manager=background_callback_manager(),
 )
 
 # Set the title for the web app
 app.title = "Model Analysis Dashboard"
 
-# Define the layout of the Dash application
-app.layout = dmc.MantineProvider(
-    html.Div(
-        className="p-10 w-full",  # Padding and width settings for the layout
-        children=[
-            # Toggle switch to show/hide last day's data
-            last_day_toggle(),
+# Define the layout of the Dash application. It is rebuilt on each page load, so pages opened after the data
+# is ready don't wait for the data_ready_interval
+def serve_layout():
+    return dmc.MantineProvider(
+        html.Div(
+            className="p-10 w-full",  # Padding and width settings for the layout
+            children=[
+                # Toggle switch to show/hide last day's data
+                last_day_toggle(),
+            
+                # Heading for the first graph
+                html.H1("How Shocky will NYIS be?", className="text-2xl font-bold"),
+            
+                # Graph displaying the shock prediction for NYIS
+                dcc.Graph(id="main_graph"),
+            
+                table_slider("main_table_slider","download_button"),
             
-            # Heading for the first graph
-            html.H1("How Shocky will NYIS be?", className="text-2xl font-bold"),
+                # Table displaying the data for the first model
+                html.Div(
+                    main_table(pd.DataFrame(),["NYISpjm shock X forecast","NYIS pjm DA regular prediction"],"main_table"),
+                    id="main_table"
+                ),
             
-            # Graph displaying the shock prediction for NYIS
-            dcc.Graph(id="main_graph", figure=main_graph(client.df, "NYISpjm shock X forecast", "NYIS pjm DA regular prediction", "NYIS pjm DA")),
+                # Heading for the second graph
+                html.H1("How Shocky will PJM be?", className="text-2xl font-bold"),
             
-            table_slider("main_table_slider","download_button"),
+                # Graph displaying the shock prediction for PJM
+                dcc.Graph(id="main_graph2"),
             
-            # Table displaying the data for the first model
-            html.Div(
-                main_table(pd.DataFrame(),["NYISpjm shock X forecast","NYIS pjm DA regular prediction"],"main_table"),
-                id="main_table"
-            ),
+                table_slider("main_table2_slider","download_button2"),
             
-            # Heading for the second graph
-            html.H1("How Shocky will PJM be?", className="text-2xl font-bold"),
+                # Table displaying the data for the second model
+                html.Div(
+                    main_table(pd.DataFrame(),["PJMnyis shock X forecast", "PJM nyis DA regular prediction"], "main_table2"),
+                    id="main_table2"
+                ),
             
-            # Graph displaying the shock prediction for PJM
-            dcc.Graph(id="main_graph2", figure=main_graph(client.df, "PJMnyis shock X forecast", "PJM nyis DA regular prediction", "PJM nyis DA")),
+                # Heading for the spread graph
+                html.H1("PJM to NYIS Shock models predicted spread", className="text-2xl font-bold"),
             
-            table_slider("main_table2_slider","download_button2"),
+                # Graph displaying the spread between PJM and NYIS shock models
+                dcc.Graph(id="spread_graph"),
             
-            # Table displaying the data for the second model
-            html.Div(
-                main_table(pd.DataFrame(),["PJMnyis shock X forecast", "PJM nyis DA regular prediction"], "main_table2"),
-                id="main_table2"
-            ),
+                # Heading for the spread graph
+                html.H1("NYIS to PJM Shock models predicted spread", className="text-2xl font-bold"),
             
-            # Heading for the spread graph
-            html.H1("PJM to NYIS Shock models predicted spread", className="text-2xl font-bold"),
+                # Graph displaying the spread between PJM and NYIS shock models
+                dcc.Graph(id="spread_graph2"),
             
-            # Graph displaying the spread between PJM and NYIS shock models
-            dcc.Graph(id="spread_graph", figure=spread_graph(client.df, "PJM to NYIS shock spread")),
+                dcc.Download(id="download-data"),
+
+                # Datetimes of the rows each table shows, sent to the export with the table's rows
+                dcc.Store(id="main_table_datetimes"),
+                dcc.Store(id="main_table2_datetimes"),
             
-            # Heading for the spread graph
-            html.H1("NYIS to PJM Shock models predicted spread", className="text-2xl font-bold"),
+                # Width of the graphs in pixels, reported by the browser and used to downsample long ranges
+                dcc.Location(id="url"),
+                dcc.Store(id="graph_width", data=DEFAULT_GRAPH_WIDTH),
             
-            # Graph displaying the spread between PJM and NYIS shock models
-            dcc.Graph(id="spread_graph2", figure=spread_graph(client.df, "NYIS to PJM shock spread")),
+                # Id of this browser session in the session store (kept while the tab is open)
+                dcc.Store(id="session_id", storage_type="session"),
             
-            dcc.Download(id="download-data")
-        ]
+                # Version of the data the graphs show; set once the data is loaded and bumped by every refresh
+                dcc.Store(id="data_version", data=session_store.version if session_store.ready else None),
+                dcc.Interval(
+                    id="data_ready_interval",
+                    interval=DATA_REFRESH_POLL_MS if session_store.ready else DATA_LOADING_POLL_MS,
+                    disabled=session_store.ready and session_store.refresh_thread is None,
+                )
+            ]
+        )
     )
-)
+
+app.layout = serve_layout
+
+@app.server.route("/_startup_timings")
+def startup_timings():
+    # Cold start latency of this worker process
+    return jsonify(STARTUP_TIMINGS)
 
 @app.callback(
+    Output("data_version", "data"),
+    Output("data_ready_interval", "disabled"),
+    Output("data_ready_interval", "interval"),
+    Input("data_ready_interval", "n_intervals"),
+    State("data_version", "data"),
+)
+def check_data_ready(n_intervals, data_version):
+    if not session_store.ready:
+        # Starts the load again if it failed
+        session_store.start_loading()
+        raise exceptions.PreventUpdate
+    if STARTUP_TIMINGS["first_data_seconds"] is None:
+        STARTUP_TIMINGS["first_data_seconds"] = session_store.loaded_at - IMPORT_STARTED
+        logger.info("First data ready %.2fs after the app import started", STARTUP_TIMINGS["first_data_seconds"])
+    # Once loaded, keep polling (slower) while refreshes can bring new hours; the graphs redraw on a new version
+    version = session_store.version if session_store.version != data_version else no_update
+    return version, session_store.refresh_thread is None, DATA_REFRESH_POLL_MS
+
+# The graphs span the page width (less the p-10 padding), so the window width is a close enough estimate
+app.clientside_callback(
+    """
+    function(pathname) {
+        return Math.max(window.innerWidth - 80, 300);
+    }
+    """,
+    Output("graph_width", "data"),
+    Input("url", "pathname"),
+)
+
+app.clientside_callback(
+    """
+    function(pathname, sessionId) {
+        if (sessionId) {
+            return sessionId;
+        }
+        // crypto.randomUUID only exists on https and localhost pages
+        if (window.crypto && crypto.randomUUID) {
+            return crypto.randomUUID();
+        }
+        return Date.now().toString(36) + "-" + Math.random().toString(36).slice(2) + Math.random().toString(36).slice(2);
+    }
+    """,
+    Output("session_id", "data"),
+    Input("url", "pathname"),
+    State("session_id", "data"),
+)
+
+# The export is prepared off the request threads, with its progress shown next to the buttons; changing the
+# data shown while it runs cancels it. It runs in another process, so the table's rows and their datetimes are
+# passed in rather than read from the session store.
+@heavy_callback(
+    app,
     Output("download-data", "data", allow_duplicate=True),
     Input("download_button", "n_clicks"),
     Input("download_button2", "n_clicks"),
     State("main_table_data", "rowData"),
     State("main_table2_data", "rowData"),
+    State("main_table_datetimes", "data"),
+    State("main_table2_datetimes", "data"),
+    progress=[Output("download_button_progress", "children"), Output("download_button2_progress", "children")],
+    running=[
+        (Output("download_button", "disabled"), True, False),
+        (Output("download_button2", "disabled"), True, False),
+        (Output("download_button_progress", "style"), {"display": "inline"}, {"display": "none"}),
+        (Output("download_button2_progress", "style"), {"display": "inline"}, {"display": "none"}),
+    ],
+    cancel=[Input("last_day_toggle", "value"), Input("data_version", "data")],
     prevent_initial_call=True
 )
-def download_logic(download_button, download_button2, main_table_data, main_table2_data):
+def download_logic(set_progress, download_button, download_button2, main_table_data, main_table2_data, main_table_datetimes, main_table2_datetimes):
     ctx = callback_context
     triggered_id = ctx.triggered[0]["prop_id"].split(".")[0] if ctx.triggered else None
     
-    buffer = io.StringIO()
     export_df = pd.DataFrame()
-    if triggered_id == "download_button":
-        export_df = parse_table_data(main_table_data, variables.export_df1.index)
-    else:
-        export_df = parse_table_data(main_table2_data, variables.export_df2.index)
-        
-    export_df.to_csv(buffer, index=False, encoding="utf-8")
-    buffer.seek(0)
+    table_data = main_table_data if triggered_id == "download_button" else main_table2_data
+    table_datetimes = main_table_datetimes if triggered_id == "download_button" else main_table2_datetimes
     
-    return dict(content=buffer.getvalue(), filename="data.csv")
-
-# Define the callback function to update the components based on input
-@app.callback(
-    [Output("main_graph", "figure"),
-     Output("main_graph2", "figure"), 
-     Output("spread_graph", "figure"),
-     Output("spread_graph2", "figure"),
-     Output("main_table", "children"),
-     Output("main_table2", "children"),
-     Output("main_table_slider_container", "className"),
-     Output("main_table2_slider_container", "className")],
-    [Input("last_day_toggle", "value"),
-     Input("main_table_slider","value"),
-     Input("main_table2_slider","value"),
-     Input("main_table_data", "cellValueChanged"),
-     Input("main_table2_data", "cellValueChanged")],
-    [State("main_table_data", "rowData"),
-     State("main_table2_data", "rowData"),
-     State("main_table", "children"),
-     State("main_table2", "children")],
-)
-def update_dashboard(last_day_toggle, main_table_slider, main_table2_slider, main_table_data, main_table2_data,main_table_data_state, main_table2_data_state, main_table_state, main_table2_state):
+    export_df = parse_table_data(table_data, pd.to_datetime(table_datetimes or []))
     
-    ctx = callback_context
-    triggered_id = ctx.triggered[0]["prop_id"].split(".")[0] if ctx.triggered else None
-    
-    # Access the data from the client
-    df = client.df
-    table_df = pd.DataFrame()  # Initialize an empty DataFrame for table data
-    display = False  # Initially, do not display the table
+    # One progress label per button, both shown while an export runs
+    content = csv_with_progress(export_df, lambda percentage: set_progress([percentage, percentage]))
     
+    return dict(content=content, filename="data.csv")
+
+# Recompute the "User Prediction" trace and table row in the browser when a slider moves (assets/clientside.js).
+# Set DASHBOARD_CLIENTSIDE_PREDICTIONS=0 to compute them on the server instead.
+CLIENTSIDE_PREDICTIONS = os.environ.get("DASHBOARD_CLIENTSIDE_PREDICTIONS", "1") == "1"
+
+# Columns drawn by each graph
+MODEL_COLUMNS = {
+    "main_graph": ["NYISpjm shock X forecast", "NYIS pjm DA regular prediction", "NYIS pjm DA"],
+    "main_graph2": ["PJMnyis shock X forecast", "PJM nyis DA regular prediction", "PJM nyis DA"],
+    "spread_graph": ["PJM to NYIS shock spread"],
+    "spread_graph2": ["NYIS to PJM shock spread"],
+}
+
+# The table and slider under each main graph
+MODEL_TABLES = {
+    "main_graph": ("main_table", "main_table_slider"),
+    "main_graph2": ("main_table2", "main_table2_slider"),
+}
 
-    # If the toggle is on, filter the data to only show the last day's data
+@contextlib.contextmanager
+def session_ops(session_id):
+    # The session's Ops, locked for the block. Callbacks wait for the background load (data_version changes
+    # when it is done) instead of fetching the data in a request thread.
+    if not session_store.ready:
+        raise exceptions.PreventUpdate
+    with session_store.use_ops(session_id) as ops:
+        yield ops
+
+def dashboard_df(session_id, last_day_toggle, columns=None):
+    # All the session's data (or only the given columns), or only the most recent day when the toggle is on.
+    # The frame is a copy, so it can be used once the session is unlocked.
+    with session_ops(session_id) as ops:
+        df = ops.frame(columns)
     if last_day_toggle:
-        last_day = client.df.index.max().date()  # Get the most recent date
-        table_df = df = client.df[client.df.index.date == last_day]  # Filter data for the last day
-        display = True  # Set display to True to show the table
+        last_day = df.index.max().date()  # Get the most recent date
+        return df[df.index.date == last_day]  # Filter data for the last day
+    return df
+
+def prevent_layout_only_update():
+    # Zooming or panning re-renders a graph at full resolution for the visible window; other layout
+    # events (autosize, y axis only) leave it as it is
+    ctx = callback_context
+    if ctx.triggered and ctx.triggered[0]["prop_id"].endswith(".relayoutData"):
+        relayout_data = ctx.triggered[0]["value"] or {}
+        if relayout_x_range(relayout_data) is None and not relayout_data.get("xaxis.autorange"):
+            raise exceptions.PreventUpdate
+
+def cached_main_graph(graph_id, df, display, slider_value, x_range, graph_width):
+    # The slider only changes the graph while the predictions are shown
+    key = cache_key(graph_id, frame_digest(df, MODEL_COLUMNS[graph_id]), display, slider_value if display else None, x_range, graph_width)
+    return figure_cache.get_or_create(
+        key, lambda: main_graph(df, *MODEL_COLUMNS[graph_id], display, slider_value, x_range=x_range, width=graph_width)
+    )
+
+def cached_spread_graph(graph_id, df, x_range, graph_width):
+    key = cache_key(graph_id, frame_digest(df, MODEL_COLUMNS[graph_id]), x_range, graph_width)
+    return figure_cache.get_or_create(
+        key, lambda: spread_graph(df, *MODEL_COLUMNS[graph_id], x_range=x_range, width=graph_width)
+    )
+
+def cached_table(table_id, cols, table_df, display, slider_value):
+    key = cache_key(table_id, frame_digest(table_df, cols), display, slider_value if display else None)
+    return figure_cache.get_or_create(key, lambda: main_table(table_df, cols, table_id, display, slider_value))
+
+def table_datetimes(table_df):
+    # The datetimes of a table's rows, as the export receives them
+    return [timestamp.isoformat() for timestamp in table_df.index]
+
+@app.callback(
+    Output("main_table_slider_container", "className"),
+    Output("main_table2_slider_container", "className"),
+    Input("last_day_toggle", "value"),
+)
+def update_slider_containers(last_day_toggle):
+    slider_className = "inline mt-5 w-full" if last_day_toggle else "hidden mt-5 w-full"
+    return slider_className, slider_className
+
+def register_model_callbacks(graph_id):
+    """
+    Registers the callbacks of a main graph and the table under it.
     
-    slider_className="inline mt-5 w-full" if display else "hidden mt-5 w-full"
-      
-    # Create the graphs with the updated data
-    graph1 = main_graph(df, "NYISpjm shock X forecast", "NYIS pjm DA regular prediction", "NYIS pjm DA", display, main_table_slider) 
-    graph2 = main_graph(df, "PJMnyis shock X forecast", "PJM nyis DA regular prediction", "PJM nyis DA", display, main_table2_slider)
-    graphS = spread_graph(df, "PJM to NYIS shock spread")
-    graphS2 = spread_graph(df, "NYIS to PJM shock spread")
+    The graph and table are rebuilt when the toggle, the graph width, the zoom window or a table cell changes.
+    Moving the slider only changes the "User Prediction" trace and table row: they are recomputed in the
+    browser, or on the server and sent as Patches when CLIENTSIDE_PREDICTIONS is off.
+    """
+    table_id, slider_id = MODEL_TABLES[graph_id]
+    cols = MODEL_COLUMNS[graph_id]
     
-    # Create the tables with the updated data
-    table1 = main_table(table_df, ["NYISpjm shock X forecast", "NYIS pjm DA regular prediction"], "main_table",display, main_table_slider)
-    table2 = main_table(table_df, ["PJMnyis shock X forecast", "PJM nyis DA regular prediction"], "main_table2",display, main_table2_slider)
+    @app.callback(
+        Output(graph_id, "figure"),
+        Output(table_id, "children"),
+        Output(f"{table_id}_datetimes", "data"),
+        Input("last_day_toggle", "value"),
+        Input("graph_width", "data"),
+        Input(graph_id, "relayoutData"),
+        Input(f"{table_id}_data", "cellValueChanged"),
+        Input("session_id", "data"),
+        Input("data_version", "data"),
+        State(slider_id, "value"),
+        State(f"{table_id}_data", "rowData"),
+    )
+    def update_model(last_day_toggle, graph_width, relayout_data, cell_value_changed, session_id, data_version, slider_value, row_data):
+        prevent_layout_only_update()
+        ctx = callback_context
+        triggered_id = ctx.triggered[0]["prop_id"].split(".")[0] if ctx.triggered else None
+        
+        df = dashboard_df(session_id, last_day_toggle, cols)
+        display = bool(last_day_toggle)
+        # The last day is always drawn whole; zoom windows only apply to the full range
+        x_range = None if display else relayout_x_range(relayout_data)
+        
+        # An edited table redraws the graph from the edited rows (those figures are not cached)
+        if triggered_id == f"{table_id}_data":
+            try:
+                export_df = parse_table_data(row_data, df.index)
+                if not export_df.empty:
+                    export_df.set_index('Datetime (HB)', inplace=True)
+                    export_df[cols[2]] = df[cols[2]]
+                graph = main_graph(export_df, *cols, display, slider_value, True, x_range=x_range, width=graph_width)
+                return graph, no_update, no_update
+            except Exception:
+                pass
+        
+        table_df = df if display else pd.DataFrame()
+        return (
+            cached_main_graph(graph_id, df, display, slider_value, x_range, graph_width),
+            cached_table(table_id, cols[:2], table_df, display, slider_value),
+            table_datetimes(table_df),
+        )
     
-
-    if triggered_id == "main_table_data":
-        try:
-            export_df = parse_table_data(main_table_data_state, df.index)
-            if not export_df.empty:
-                export_df.set_index('Datetime (HB)', inplace=True)
-                export_df["NYIS pjm DA"] = df["NYIS pjm DA"]
-                
-            graph1 = main_graph(export_df, "NYISpjm shock X forecast", "NYIS pjm DA regular prediction", "NYIS pjm DA", display, main_table_slider, True)
-            table1 = main_table_state
-        except Exception as e:
-            pass
+    if CLIENTSIDE_PREDICTIONS:
+        app.clientside_callback(
+            f"""
+            function(sliderValue, lastDayToggle, figure, rowData) {{
+                return window.dash_clientside.predictions.update_user_prediction(
+                    sliderValue, lastDayToggle, figure, rowData, {USER_PREDICTION_TRACE}
+                );
+            }}
+            """,
+            Output(graph_id, "figure", allow_duplicate=True),
+            Output(f"{table_id}_data", "rowData"),
+            Input(slider_id, "value"),
+            State("last_day_toggle", "value"),
+            State(graph_id, "figure"),
+            State(f"{table_id}_data", "rowData"),
+            prevent_initial_call=True,
+        )
+        return
+    
+    @app.callback(
+        Output(graph_id, "figure", allow_duplicate=True),
+        Output(table_id, "children", allow_duplicate=True),
+        Input(slider_id, "value"),
+        State("last_day_toggle", "value"),
+        State("graph_width", "data"),
+        State(f"{table_id}_data", "cellValueChanged"),
+        State("session_id", "data"),
+        prevent_initial_call=True,
+    )
+    def update_user_prediction(slider_value, last_day_toggle, graph_width, cell_value_changed, session_id):
+        # The predictions are only drawn (and the slider only shown) with the last day
+        if not last_day_toggle:
+            raise exceptions.PreventUpdate
+        df = dashboard_df(session_id, last_day_toggle, cols)
         
-    if triggered_id == "main_table2_data":
-        try:
-            export_df = parse_table_data(main_table2_data_state, df.index)
-            if not export_df.empty:
-                export_df.set_index('Datetime (HB)', inplace=True)
-                export_df["PJM nyis DA"] = df["PJM nyis DA"]
-            graph2 =  main_graph(export_df, "PJMnyis shock X forecast", "PJM nyis DA regular prediction", "PJM nyis DA", display, main_table2_slider, True)
-            table2 = main_table2_state
-        except:
-            pass
-    # Return the updated figures and table components
-    return graph1, graph2, graphS, graphS2, table1, table2, slider_className, slider_className
+        # After a cell was edited, the graph and table go back to the data, as they did before the split
+        if cell_value_changed:
+            return (
+                cached_main_graph(graph_id, df, True, slider_value, None, graph_width),
+                cached_table(table_id, cols[:2], df, True, slider_value),
+            )
+        
+        predictions_df = last_day_predictions(df, cols[:2], slider_value)
+        
+        figure = Patch()
+        figure["data"][USER_PREDICTION_TRACE]["y"] = predictions_df["User Prediction"].to_numpy().tolist()
+        table = Patch()
+        table["props"]["children"][0]["props"]["rowData"][2] = user_prediction_row(predictions_df)
+        return figure, table
+
+def register_spread_callback(graph_id):
+    @app.callback(
+        Output(graph_id, "figure"),
+        Input("last_day_toggle", "value"),
+        Input("graph_width", "data"),
+        Input(graph_id, "relayoutData"),
+        Input("session_id", "data"),
+        Input("data_version", "data"),
+    )
+    def update_spread(last_day_toggle, graph_width, relayout_data, session_id, data_version):
+        prevent_layout_only_update()
+        x_range = None if last_day_toggle else relayout_x_range(relayout_data)
+        df = dashboard_df(session_id, last_day_toggle, MODEL_COLUMNS[graph_id])
+        return cached_spread_graph(graph_id, df, x_range, graph_width)
+
+# Each graph (and its table) updates on its own inputs only
+for graph_id in MODEL_TABLES:
+    register_model_callbacks(graph_id)
+for graph_id in ["spread_graph", "spread_graph2"]:
+    register_spread_callback(graph_id)
+
 
+STARTUP_TIMINGS["import_seconds"] = time.perf_counter() - IMPORT_STARTED
+logger.info("App imported in %.2fs", STARTUP_TIMINGS["import_seconds"])
 
 # Run the Dash application
 if __name__ == "__main__":
@@ -0,0 +1,60 @@
+// Clientside callbacks of the dashboard (Dash serves every file in assets/ automatically)
+window.dash_clientside = Object.assign({}, window.dash_clientside, {
+    predictions: {
+        /**
+         * Recomputes the "User Prediction" trace of a main graph and its table row in the browser when the
+         * table slider moves, from the shock (trace 0) and regular (trace 1) predictions already drawn.
+         *
+         * It follows calculate_user_predictions: start from the lower of the two models (the shock model
+         * when they are equal) and move towards the other one by the slider percentage. Table values are
+         * rounded like pandas' round(2), i.e. half to even.
+         */
+        update_user_prediction: function(sliderValue, lastDayToggle, figure, rowData, traceIndex) {
+            const noUpdate = window.dash_clientside.no_update;
+            // The predictions are only drawn (and the slider only shown) with the last day
+            if (!lastDayToggle || !figure || !figure.data || !figure.data[traceIndex]) {
+                return [noUpdate, noUpdate];
+            }
+            const shock = figure.data[0].y;
+            const regular = figure.data[1].y;
+            if (!Array.isArray(shock) || !Array.isArray(regular)) {
+                return [noUpdate, noUpdate];
+            }
+
+            const percentage = sliderValue / 100.0;
+            const predictions = shock.map(function(shockModel, i) {
+                const regularModel = regular[i];
+                if (shockModel === null || regularModel === null) {
+                    return null;
+                }
+                const absDifference = Math.abs(shockModel - regularModel);
+                return (shockModel > regularModel ? regularModel : shockModel) + absDifference * percentage;
+            });
+
+            const data = figure.data.slice();
+            data[traceIndex] = Object.assign({}, data[traceIndex], {y: predictions});
+            const newFigure = Object.assign({}, figure, {data: data});
+
+            let newRowData = noUpdate;
+            if (Array.isArray(rowData) && rowData.length > 2) {
+                const row = {Hour: "User Prediction"};
+                predictions.forEach(function(prediction, hour) {
+                    row[hour] = prediction === null ? null : roundHalfEven(prediction, 2);
+                });
+                newRowData = rowData.slice();
+                newRowData[2] = row;
+            }
+            return [newFigure, newRowData];
+        }
+    }
+});
+
+function roundHalfEven(value, decimals) {
+    const scale = Math.pow(10, decimals);
+    const scaled = value * scale;
+    let rounded = Math.round(scaled);
+    if (Math.abs(scaled % 1) === 0.5) {
+        rounded = 2 * Math.round(scaled / 2);
+    }
+    return rounded / scale;
+}
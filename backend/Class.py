@@ -1,4 +1,7 @@
-from backend.endpoint_helper import simple_request
+from backend.calendar_index import CalendarIndex
+from backend.curve_fits import FitStatistics, cached_fit_curves, fit_cache_key, values_digest
+from backend.endpoint_helper import TIMEZONE, simple_request
+from backend.expressions import ExpressionEvaluator, canonical_key, compile_equation, describe_term, equation_features, equation_lookback
 from backend.db_dictionaries import (
     feature_db_id_to_read_name,
     feature_db_name_to_read_name_dict,
@@ -7,6 +10,7 @@ from backend.db_dictionaries import (
     features_read_name_to_db_id_dict,
 )
 from backend.helper_functions import *
+import numpy as np
 import pandas as pd
 import uuid
 from datetime import date, datetime
@@ -15,7 +19,10 @@ import pdb
 
 
 class Ops:
-    def __init__(self) -> None:
+    def __init__(self, compact: bool = False) -> None:
+
+        # Compact storage: features are held (and created features computed) as float32 instead of float64
+        self.compact = compact
 
         # Start date for the range of dates the user wants data for
         self.start_date = date(2024, 10, 20)
@@ -30,7 +37,19 @@ class Ops:
         # Dataframe to hold all the requested data based on self.start_date, self.end_date, and self.data_features
         self.df = pd.DataFrame()
 
-        self.filter_df = pd.DataFrame()
+        # Features and date range self.df currently holds, so update_df only has to fetch what changed
+        self.loaded_features = []
+        self.loaded_start_date = None
+        self.loaded_end_date = None
+
+        # Version of the values of each feature in self.df, bumped whenever they are fetched or changed
+        self.column_versions = {}
+
+        # Created features are not columns of self.df: they are computed the first time a graph, table or filter
+        # reads them (see self.column_values) and kept here, keyed by feature_id: {"index", "sources", "values",
+        # "filtered"}. An entry is valid while "index" is self.df's index and "sources" the versions of the features
+        # its equation reads; "filtered" holds (filter_mask, values) for cumulative features summed over the filtered rows.
+        self.virtual_columns = {}
 
         # A list of dictoinaries, each representing a graph. Each graph dictionary has a unique id and a list of features it will graph:
         self.graphs = []
@@ -55,8 +74,21 @@ class Ops:
 
         # self.increasing_decreasing_filter = []
 
-        # A list of dates that should be excluded based off of the data in the dataframe and all the filters
-        self.datetimes_to_exclude = []
+        # Boolean mask over self.df.index of the rows that pass every filter (True = keep)
+        self.filter_mask = np.ones(0, dtype=bool)
+
+        # Cached sub-mask of each filter, keyed by "hour", "day_of_week", "month", "year" or a feature filter's
+        # filter_uid, so changing one filter only recomputes its own part. Valid for self.filter_masks_index only.
+        self.filter_masks = {}
+        self.filter_masks_index = None
+
+        # Hour/weekday/month/year buckets of self.df.index, rebuilt once per loaded frame
+        self.calendar_index = None
+
+        # Content hash of each column of self.df used by a scatter graph, for the curve fit cache. Valid for
+        # self.column_digests_df only (columns are never changed in place, only added or dropped).
+        self.column_digests = {}
+        self.column_digests_df = None
 
         # A toggle to switch bettween viewing the filtered data and the un filtered data
         self.apply_filters_toggle = False
@@ -86,14 +118,167 @@ class Ops:
         self.scatter_graphs = []
         # single dictionary ex. {"graph_uid": '6da8871a-2860-474d-a8bf-4efa7383e26b', "graph_data_features": ["MISO pjm RT", "MISO pjm DA"]}
 
+        # Running curve fit statistics of each scatter graph, keyed by graph_uid: {"features", "df", "mask",
+        # "statistics"}. When the rows a graph shows change, only the rows that entered or left "mask" are added
+        # to or removed from "statistics". Valid while "df" is self.df.
+        self.scatter_statistics = {}
+
     def update_df(self):
         if self.data_features and self.start_date and self.end_date:
-            db_names = []
-            for feature in self.data_features:
-                db_names.append(feature_read_name_to_db_name_dict[feature])
-            self.df = simple_request(self.start_date, self.end_date, db_names)[0]
-            self.df.rename(columns=feature_db_name_to_read_name_dict, inplace=True)
-        self.add_created_features_to_df()
+            start_date = pd.Timestamp(self.start_date)
+            end_date = pd.Timestamp(self.end_date)
+            if self.df.empty or not self.loaded_features:
+                self.df = self.fetch_features(self.data_features, start_date, end_date)
+                self.bump_column_versions(self.data_features)
+            else:
+                self.update_df_delta(start_date, end_date)
+            self.loaded_features = list(self.data_features)
+            self.loaded_start_date = start_date
+            self.loaded_end_date = end_date
+        self.update_filter_mask()
+
+    def bump_column_versions(self, features: list[str]):
+        # Marks the values of features as changed, so the created features reading them are computed again.
+        # A new dict, as copies of this object (see SessionStore.refresh) share the old one.
+        self.column_versions = {
+            **self.column_versions,
+            **{feature: self.column_versions.get(feature, 0) + 1 for feature in features},
+        }
+
+    def fetch_features(self, features: list[str], start_date, end_date, refresh: bool = False):
+        # refresh fetches the range again instead of reading it from the feature cache, to get revised values
+        db_names = []
+        for feature in features:
+            db_names.append(feature_read_name_to_db_name_dict[feature])
+        df = simple_request(start_date.strftime("%Y-%m-%d"), end_date.strftime("%Y-%m-%d"), db_names, refresh=refresh)[0]
+        df.rename(columns=feature_db_name_to_read_name_dict, inplace=True)
+        if self.compact:
+            df = df.astype(np.float32)
+        return df
+
+    def update_df_delta(self, start_date, end_date):
+        # Diff the requested (features, start, end) against what self.df already holds: removed features and
+        # dates outside the new window are sliced away, and only added features and extended date edges are fetched
+        added_features = [feature for feature in self.data_features if feature not in self.loaded_features]
+        removed_features = [feature for feature in self.loaded_features if feature not in self.data_features]
+        kept_features = [feature for feature in self.loaded_features if feature in self.data_features]
+        extends_start = start_date < self.loaded_start_date
+        extends_end = end_date > self.loaded_end_date
+
+        # Created features are computed again when the rows change or a feature they read is added or removed (see
+        # self.column_values)
+        df = self.df.drop(columns=removed_features)
+        self.bump_column_versions(removed_features)
+        lower_bound, upper_bound = window_bounds(start_date, end_date, df.index)
+        df = df[(df.index >= lower_bound) & (df.index <= upper_bound)]
+
+        new_rows = []
+        if kept_features and extends_start:
+            new_rows.append(self.fetch_features(kept_features, start_date, min(end_date, self.loaded_start_date - pd.Timedelta(days=1))))
+        if kept_features and extends_end:
+            new_rows.append(self.fetch_features(kept_features, max(start_date, self.loaded_end_date + pd.Timedelta(days=1)), end_date))
+        new_rows = [rows for rows in new_rows if not rows.empty]
+        if new_rows:
+            df = pd.concat([df] + new_rows).sort_index()
+
+        if added_features:
+            added_df = self.fetch_features(added_features, start_date, end_date)
+            df = added_df if df.empty else df.join(added_df, how="outer")
+            self.bump_column_versions(added_features)
+
+        self.df = df[[feature for feature in self.data_features if feature in df.columns]]
+
+    def append_new_hours(self, end_date, fetched_df: pd.DataFrame = None):
+        # Brings self.df up to end_date without reloading it: the hours from the last loaded day on are fetched
+        # again (or taken from fetched_df, a frame already holding them), hours that were published or changed
+        # since are merged in, and only those rows of the created features and filter masks are recomputed.
+        # Returns how many rows were added or changed.
+        if self.df.empty or not self.loaded_features:
+            return 0
+        end_date = pd.Timestamp(end_date)
+        last_hour = self.df.index[-1]
+        if last_hour.tzinfo is not None:
+            last_hour = last_hour.tz_convert(TIMEZONE).tz_localize(None)
+        last_day = last_hour.normalize()
+        if end_date < last_day:
+            return 0
+
+        # Loaded features without data are not columns of self.df, and those the fetch has no data for keep their
+        # loaded values (their new hours stay missing)
+        raw_columns = [feature for feature in self.loaded_features if feature in self.df.columns]
+        if not raw_columns:
+            return 0
+        if fetched_df is None:
+            fetched_df = self.fetch_features(raw_columns, last_day, end_date, refresh=True)
+        fetched_columns = [column for column in raw_columns if column in fetched_df.columns]
+        if fetched_df.empty or not fetched_columns:
+            return 0
+        lower_bound, upper_bound = window_bounds(last_day, end_date, self.df.index)
+        fetched_df = fetched_df.loc[(fetched_df.index >= lower_bound) & (fetched_df.index <= upper_bound), fetched_columns]
+        if fetched_df.empty:
+            return 0
+
+        # Merge the fetched hours over the loaded ones (never dropping a loaded value) and find the first row that differs
+        first_position = self.df.index.searchsorted(fetched_df.index[0])
+        loaded_tail = self.df.iloc[first_position:][raw_columns]
+        tail = fetched_df.combine_first(loaded_tail)[raw_columns]
+        previous = loaded_tail.reindex(tail.index).to_numpy(dtype=float)
+        current = tail.to_numpy(dtype=float)
+        changed_rows = ((previous != current) & ~(np.isnan(previous) & np.isnan(current))).any(axis=1)
+        if not changed_rows.any():
+            return 0
+        first_changed = int(np.argmax(changed_rows))
+        tail = tail.iloc[first_changed:]
+        changed_position = self.df.index.searchsorted(tail.index[0])
+
+        # The created features computed so far are extended over the changed rows, reading the rows their lags and
+        # rolling windows need before them; the others are computed when they are first read
+        created_features = [
+            feature
+            for feature in self.created_features
+            if self.virtual_column(feature) is not None
+            and all(source in raw_columns for source in equation_features(feature["equation"]))
+        ]
+        lookback = max((equation_lookback(feature["equation"]) for feature in created_features), default=0)
+        window_start = max(changed_position - lookback, 0)
+        start = changed_position - window_start
+        window = pd.concat([self.df.iloc[window_start:changed_position][raw_columns], tail])
+        evaluator = ExpressionEvaluator(window)
+        extended_values = {}
+        for feature in created_features:
+            previous_values = self.virtual_column(feature)[:changed_position]
+            window = extend_custom_feature_column(window, feature, start, previous_values, evaluator)
+            extended_values[feature["feature_id"]] = np.concatenate(
+                [previous_values, window[feature["feature_name"]].to_numpy()[start:]]
+            ).astype(previous_values.dtype)
+
+        previous_index = self.df.index
+        self.df = pd.concat([self.df.iloc[:changed_position], window.iloc[start:][list(self.df.columns)]])
+        self.bump_column_versions(raw_columns)
+        self.virtual_columns = {}
+        for feature in created_features:
+            self.store_virtual_column(feature, extended_values[feature["feature_id"]])
+        self.loaded_end_date = max(self.loaded_end_date, end_date)
+        if pd.Timestamp(self.end_date) < end_date:
+            self.end_date = end_date.strftime("%Y-%m-%d")
+
+        # Rows before changed_position are unchanged, so their cached filter masks are kept and only extended
+        if self.filter_masks_index is previous_index and self.df.index[: len(previous_index)].equals(previous_index):
+            filter_masks = {}
+            for feature_filter in self.feature_filters:
+                mask = self.filter_masks.get(feature_filter["filter_uid"])
+                if mask is not None:
+                    filter_masks[feature_filter["filter_uid"]] = np.concatenate(
+                        [
+                            mask[:changed_position],
+                            get_feature_filter_mask(self.frame([feature_filter["feature_name"]]).iloc[changed_position:], feature_filter),
+                        ]
+                    )
+            self.filter_masks = filter_masks
+            self.filter_masks_index = self.df.index
+            self.calendar_index = self.calendar_index.extended(self.df.index)
+        self.update_filter_mask()
+        return len(self.df) - changed_position
 
     def update_date_range(self, new_start, new_end):
         self.start_date = new_start
@@ -129,14 +314,14 @@ class Ops:
     def update_hour_filters(self, hours_to_include: list[int]):
         self.hour_filters = hours_to_include
         if not self.df.empty:
-            self.update_datetimes_to_exclude()
+            self.update_filter_mask(["hour"])
 
     def update_date_filters(self, days_of_week_to_include: list[int], months_to_include: list[int], years_to_include: list[int]):
         self.day_of_week_filters = days_of_week_to_include
         self.month_filters = months_to_include
         self.year_filters = years_to_include
         if not self.df.empty:
-            self.update_datetimes_to_exclude()
+            self.update_filter_mask(["day_of_week", "month", "year"])
 
     def add_feature_filter(self, feature_name: str, lower_bound: float, upper_bound: float):
         # Input Check TODO: only allow user to select features from self.data_features or self.created_features. 
@@ -153,7 +338,7 @@ class Ops:
             self.feature_filters.append(new_feature_filter)
 
             if not self.df.empty:
-                self.update_datetimes_to_exclude()
+                self.update_filter_mask()
         else:
             print(f'A filter already exists for the {feature_name} feature')
 
@@ -163,7 +348,7 @@ class Ops:
             for filters in self.feature_filters
             if filters["filter_uid"] != target_uuid
         ]
-        self.update_datetimes_to_exclude()
+        self.update_filter_mask([target_uuid])
 
     # def add_increasing_decreasing_filter(self, feature_name:str, increaseing:bool):
 
@@ -175,34 +360,49 @@ class Ops:
     #     self.increasing_decreasing_filter.append(new_increasing_decreasing_filter)
 
     #     if not self.df.empty:
-    #         self.update_datetimes_to_exclude()
-
-    def update_datetimes_to_exclude(self):
-        if not self.df.empty:
-            self.datetimes_to_exclude = get_excluded_datetimes(
-                self.df,
-                self.hour_filters,
-                self.day_of_week_filters,
-                self.month_filters,
-                self.year_filters,
-                self.feature_filters,
-            )
-            self.update_filter_df()
-
-    def update_filter_df(self):
-        self.filter_df = self.df
-
-        # drop cumulative created features so cumulative values can be recalculated with filters
-        for custom_feature in self.created_features:
-            if custom_feature["cumulative?"] == True:
-                self.filter_df = self.filter_df.drop(custom_feature["feature_name"], axis=1)
-
-        for datetimes in self.datetimes_to_exclude:
-            self.filter_df = self.filter_df.drop(datetimes)
-
-        for feature in self.created_features:
-            if feature["feature_name"] not in self.filter_df.columns.to_list():   
-                self.filter_df = add_custom_feature_column(self.filter_df, feature)
+    #         self.update_filter_mask()
+
+    def update_filter_mask(self, changed_filters: list[str] = None):
+        if self.df.empty:
+            return
+        # A new frame invalidates every cached sub-mask and the calendar index; otherwise only the filters
+        # that changed are recomputed
+        if self.filter_masks_index is not self.df.index:
+            self.filter_masks = {}
+            self.filter_masks_index = self.df.index
+            self.calendar_index = CalendarIndex(self.df.index)
+        for key in changed_filters or []:
+            self.filter_masks.pop(key, None)
+
+        calendar_filters = {
+            "hour": self.hour_filters,
+            "day_of_week": self.day_of_week_filters,
+            "month": self.month_filters,
+            "year": self.year_filters,
+        }
+        for key, values_to_include in calendar_filters.items():
+            if key not in self.filter_masks:
+                self.filter_masks[key] = self.calendar_index.mask(key, values_to_include)
+
+        feature_filter_uids = []
+        for feature_filter in self.feature_filters:
+            feature_filter_uids.append(feature_filter["filter_uid"])
+            if feature_filter["filter_uid"] not in self.filter_masks:
+                self.filter_masks[feature_filter["filter_uid"]] = get_feature_filter_mask(
+                    self.frame([feature_filter["feature_name"]]), feature_filter
+                )
+
+        mask = np.ones(len(self.df.index), dtype=bool)
+        for key in list(calendar_filters) + feature_filter_uids:
+            mask &= self.filter_masks[key]
+        self.filter_mask = mask
+
+    @property
+    def filter_df(self):
+        # The rows that pass every filter, with every raw and created feature; built from self.filter_mask when read
+        if self.df.empty:
+            return pd.DataFrame()
+        return self.frame(filtered=True)
 
     def create_feature(self, feature_operation_list: list, cumulative: bool = False, custom_name:str = None ):
         # feature_operation_list example
@@ -211,17 +411,22 @@ class Ops:
         #     {"Feature": "MISO pjm DA", "Operation": "-"},     (all subsequent features have a plus or minus operation value. there can be as many subsequent features as the user wants)
         #      {"Feature": "PJM miso DA", "Operatiion": "+"}
         # ]
+        # Terms may also be constants and use "*" or "/", lags and rolling windows (see backend/expressions.py), e.g.
+        #     {"Constant": 2, "Operation": "*"}, {"Feature": "PJM miso DA", "Operation": "+", "Lag": 24}
         # Feature options to create a custom feature should only be features in self.data_features 
 
+        # Raises ValueError for an unknown operation or aggregate now, rather than when a graph first reads the feature
+        compile_equation(feature_operation_list)
+
         if not custom_name:
-            for idx, features in enumerate(feature_operation_list):
+            for idx, term in enumerate(feature_operation_list):
                 if idx == 0:
-                    custom_name = features["Feature"]
+                    custom_name = describe_term(term)
                 
                 else:
-                    custom_name = custom_name + " " + features["Operation"] + " " + features["Feature"]
+                    custom_name = custom_name + " " + term["Operation"] + " " + describe_term(term)
 
-        custom_feature_unit = get_feature_units(feature_operation_list[0]["Feature"])
+        custom_feature_unit = get_feature_units(equation_features(feature_operation_list)[0])
         self.created_features.append(
             {
             "feature_name": custom_name,
@@ -231,7 +436,6 @@ class Ops:
             "unit" : custom_feature_unit
             }
         )
-        self.add_created_features_to_df()
 
     def remove_custom_feature(self, target_uid: str):
         # Don't let the user remove a created feature if there is a feature filter that is dependent on it (tell user to delete the filter first)
@@ -242,14 +446,107 @@ class Ops:
         self.created_features = [
             features for features in self.created_features if features['feature_id'] != target_uid
         ]
-        self.df = self.df.drop(removed_feature_name, axis=1)
-        self.filter_df = self.filter_df.drop(removed_feature_name, axis=1)
+        self.virtual_columns.pop(target_uid, None)
+        # A feature created later under the same name must not reuse this one's fit statistics
+        self.column_digests.pop(removed_feature_name, None)
+        self.scatter_statistics = {
+            graph_uid: entry for graph_uid, entry in self.scatter_statistics.items() if removed_feature_name not in entry["features"]
+        }
 
-    def add_created_features_to_df(self):
+    def store_virtual_column(self, feature: dict, values):
+        # Caches a created feature's values over self.df (as a new dict, see bump_column_versions)
+        if self.compact:
+            values = values.astype(np.float32, copy=False)
+        self.virtual_columns = {
+            **self.virtual_columns,
+            feature["feature_id"]: {
+                "index": self.df.index,
+                "sources": {source: self.column_versions.get(source) for source in equation_features(feature["equation"])},
+                "values": values,
+                "filtered": None,
+            },
+        }
+        return values
+
+    def virtual_column(self, feature: dict):
+        # A created feature's cached values over self.df, or None when they were not computed since self.df's
+        # rows or the features its equation reads last changed
+        entry = self.virtual_columns.get(feature["feature_id"])
+        if entry is None:
+            return None
+        sources = {source: self.column_versions.get(source) for source in equation_features(feature["equation"])}
+        if entry["sources"] != sources or not (entry["index"] is self.df.index or entry["index"].equals(self.df.index)):
+            return None
+        if entry["index"] is not self.df.index:
+            # Same rows in a new frame: keep the next check an identity test
+            self.virtual_columns = {**self.virtual_columns, feature["feature_id"]: {**entry, "index": self.df.index}}
+        return entry["values"]
+
+    def expression_evaluator(self, filtered: bool = False):
+        # A new evaluator over self.df, or over its filtered rows. The one over self.df starts from the created
+        # features already computed, so features sharing them (e.g. their negations) reuse their values. Evaluators
+        # are dropped after use (see self.frame), so each created feature's values are only kept in virtual_columns.
+        if filtered:
+            return ExpressionEvaluator(self.df.loc[self.filter_mask])
+        evaluator = ExpressionEvaluator(self.df)
         for feature in self.created_features:
-            if feature["feature_name"] not in self.df.columns.to_list():   
-                self.df = add_custom_feature_column(self.df, feature)
-        self.update_datetimes_to_exclude()
+            values = None if feature["cumulative?"] else self.virtual_column(feature)
+            if values is not None:
+                evaluator.cache[canonical_key(compile_equation(feature["equation"]))] = values
+        return evaluator
+
+    def column_values(self, name: str, filtered: bool = False, evaluators: dict = None):
+        # Values of a raw or created feature over every row of self.df, or over the filtered rows. Created features
+        # are computed on first read and cached (see self.virtual_columns). Calls given the same evaluators dict
+        # share their evaluators ({filtered: evaluator}), and so the sub-expressions their features have in common.
+        feature = next((feature for feature in self.created_features if feature["feature_name"] == name), None)
+        if feature is None:
+            values = self.df[name].to_numpy()
+            return values[self.filter_mask] if filtered else values
+
+        if evaluators is None:
+            evaluators = {}
+        values = self.virtual_column(feature)
+        if values is None:
+            if False not in evaluators:
+                evaluators[False] = self.expression_evaluator()
+            evaluator = evaluators[False]
+            values = custom_feature_values(evaluator.df, feature, evaluator)
+            if values is None:
+                values = np.full(len(self.df.index), np.nan)
+            values = self.store_virtual_column(feature, values)
+        if not filtered:
+            return values
+        if not feature["cumulative?"]:
+            return values[self.filter_mask]
+
+        # Cumulative features are summed over the filtered rows only, and computed again when the filters change
+        entry = self.virtual_columns[feature["feature_id"]]
+        if entry["filtered"] is None or entry["filtered"][0] is not self.filter_mask:
+            if True not in evaluators:
+                evaluators[True] = self.expression_evaluator(filtered=True)
+            evaluator = evaluators[True]
+            filtered_values = custom_feature_values(evaluator.df, feature, evaluator)
+            if filtered_values is None:
+                filtered_values = np.full(len(evaluator.index), np.nan)
+            entry = {**entry, "filtered": (self.filter_mask, filtered_values.astype(values.dtype, copy=False))}
+            self.virtual_columns = {**self.virtual_columns, feature["feature_id"]: entry}
+        return entry["filtered"][1]
+
+    def frame(self, columns: list[str] = None, filtered: bool = False):
+        # The frame graphs and tables read: the requested raw and created features, over every row or only the
+        # filtered rows. By default every raw feature and the created features whose inputs are all loaded.
+        if columns is None:
+            columns = list(self.df.columns) + [
+                feature["feature_name"]
+                for feature in self.created_features
+                if all(source in self.df.columns for source in equation_features(feature["equation"]))
+            ]
+        index = self.df.index[self.filter_mask] if filtered else self.df.index
+        evaluators = {}
+        return pd.DataFrame(
+            {name: self.column_values(name, filtered, evaluators) for name in columns}, index=index, columns=columns
+        )
 
     def add_scatter_graph(self, feature1, feature2):
         # Only allow user to select features from the self.data_features or self.created_features lists (if it is a created_feature it cannot be cummulative)
@@ -262,10 +559,62 @@ class Ops:
         }
         self.scatter_graphs.append(new_graph)
 
+    def scatter_graph_mask(self):
+        # Rows the scatter graphs show: the filtered rows when filters are applied, otherwise every row
+        if self.apply_filters_toggle:
+            return self.filter_mask
+        return np.ones(len(self.df.index), dtype=bool)
+
+    def scatter_graph_statistics(self, scatter_graph: dict):
+        # Brings a scatter graph's running fit statistics to the rows it shows now, in O(rows that changed) unless
+        # the frame or the features changed (or most rows did) and they are gathered again
+        feature1, feature2 = scatter_graph["graph_data_features"]
+        x = np.asarray(self.column_values(feature1), dtype=float)
+        y = np.asarray(self.column_values(feature2), dtype=float)
+        mask = self.scatter_graph_mask()
+
+        entry = self.scatter_statistics.get(scatter_graph["graph_uid"])
+        if entry is not None and entry["df"] is self.df and entry["features"] == [feature1, feature2]:
+            entered = np.flatnonzero(mask & ~entry["mask"])
+            left = np.flatnonzero(entry["mask"] & ~mask)
+            if len(entered) + len(left) <= np.count_nonzero(mask):
+                statistics = entry["statistics"]
+                statistics.add(x[entered], y[entered])
+                statistics.remove(x[left], y[left])
+                entry["mask"] = mask
+                return statistics
+
+        statistics = FitStatistics.from_values(x[mask], y[mask])
+        self.scatter_statistics[scatter_graph["graph_uid"]] = {
+            "features": [feature1, feature2],
+            "df": self.df,
+            "mask": mask,
+            "statistics": statistics,
+        }
+        return statistics
+
+    def scatter_graph_fits(self, scatter_graph: dict):
+        # Curve fits of a scatter graph over the rows it shows, cached per feature pair, values and rows so
+        # unchanged graphs are not fitted again. The power fit's R² is measured on y, so it takes one pass over
+        # the shown rows when the fits are derived; every other fit comes from the running statistics.
+        feature1, feature2 = scatter_graph["graph_data_features"]
+        x = np.asarray(self.column_values(feature1), dtype=float)
+        y = np.asarray(self.column_values(feature2), dtype=float)
+        mask = self.scatter_graph_mask()
+        if self.column_digests_df is not self.df:
+            self.column_digests = {}
+            self.column_digests_df = self.df
+        for feature, values in ((feature1, x), (feature2, y)):
+            if feature not in self.column_digests:
+                self.column_digests[feature] = values_digest(values)
+        key = fit_cache_key([feature1, feature2, self.column_digests[feature1], self.column_digests[feature2]], mask)
+        return cached_fit_curves(key, x[mask], y[mask], self.scatter_graph_statistics(scatter_graph))
+
     def remove_sccatter_graph(self, target_uuid):
         self.scatter_graphs = [
             graphs for graphs in self.scatter_graphs if graphs['graph_uid'] != target_uuid
         ]
+        self.scatter_statistics.pop(target_uuid, None)
 
     def download_df(self):
         self.df.to_csv("C:\\Users\\achowdhury\\Downloads\\candel_df.csv")
\ No newline at end of file
@@ -0,0 +1,87 @@
+import numpy as np
+import pandas as pd
+
+
+class CalendarIndex:
+    """
+    Precomputed hour, weekday, month and year buckets of a DatetimeIndex.
+
+    The calendar fields are extracted once per loaded frame as small-int arrays. For every distinct value the
+    row positions and a packed bitmap of those rows are kept, so a calendar filter becomes an OR over at most
+    24 + 7 + 12 + N bucket bitmaps instead of a scan over the whole index.
+
+    Args:
+        index (pd.DatetimeIndex): The index of the loaded frame.
+    """
+
+    FIELDS = {
+        "hour": ("hour", np.int8),
+        "day_of_week": ("weekday", np.int8),
+        "month": ("month", np.int8),
+        "year": ("year", np.int16),
+    }
+
+    def __init__(self, index: pd.DatetimeIndex):
+        self.index = index
+        self.size = len(index)
+        self.values = {}
+        self.positions = {}
+        self.bitmaps = {}
+        for key, (attribute, dtype) in self.FIELDS.items():
+            values = np.asarray(getattr(index, attribute), dtype=dtype)
+            order = np.argsort(values, kind="stable")
+            bucket_values, starts = np.unique(values[order], return_index=True)
+            self.values[key] = values
+            self.positions[key] = dict(zip(bucket_values.tolist(), np.split(order, starts[1:])))
+            self.bitmaps[key] = {
+                value: np.packbits(self._bool(positions)) for value, positions in self.positions[key].items()
+            }
+
+    def _bool(self, positions: np.ndarray) -> np.ndarray:
+        mask = np.zeros(self.size, dtype=bool)
+        mask[positions] = True
+        return mask
+
+    def extended(self, index: pd.DatetimeIndex) -> "CalendarIndex":
+        """
+        Returns the calendar index of a longer index whose first rows are this index, e.g. after new hours were
+        appended to the loaded frame. Only the appended rows are bucketed; this index is left unchanged.
+
+        Args:
+            index (pd.DatetimeIndex): The new index, starting with every row of self.index.
+
+        Returns:
+            CalendarIndex: The calendar index of `index`.
+        """
+        new_rows = index[self.size :]
+        calendar_index = CalendarIndex.__new__(CalendarIndex)
+        calendar_index.index = index
+        calendar_index.size = len(index)
+        calendar_index.values = {}
+        calendar_index.positions = {}
+        calendar_index.bitmaps = {}
+        for key, (attribute, dtype) in self.FIELDS.items():
+            values = np.asarray(getattr(new_rows, attribute), dtype=dtype)
+            positions = dict(self.positions[key])
+            bitmaps = dict(self.bitmaps[key])
+            # Buckets without new rows keep their (shorter) bitmaps, mask() only ORs them into the rows they cover
+            for value in np.unique(values).tolist():
+                added = self.size + np.flatnonzero(values == value)
+                positions[value] = np.concatenate([positions[value], added]) if value in positions else added
+                bitmaps[value] = np.packbits(calendar_index._bool(positions[value]))
+            calendar_index.values[key] = np.concatenate([self.values[key], values])
+            calendar_index.positions[key] = positions
+            calendar_index.bitmaps[key] = bitmaps
+        return calendar_index
+
+    def mask(self, key: str, values_to_include) -> np.ndarray:
+        """
+        Returns a boolean mask of the rows whose `key` value ("hour", "day_of_week", "month" or "year") is included.
+        """
+        bitmap = np.zeros((self.size + 7) // 8, dtype=np.uint8)
+        for value in set(values_to_include):
+            bucket = self.bitmaps[key].get(value)
+            if bucket is not None:
+                covered = bitmap[: len(bucket)]
+                np.bitwise_or(covered, bucket, out=covered)
+        return np.unpackbits(bitmap, count=self.size).view(bool)
@@ -0,0 +1,303 @@
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from typing import NamedTuple
+
+import numpy as np
+
+
+# Curves drawn over a scatter graph, in legend order
+FIT_MODELS = ("linear", "log", "poly", "power")
+
+# Positions of the running sums in FitStatistics.sums. x and y are shifted (and x scaled) by the statistics'
+# centers first so the polynomial sums stay well conditioned; "l" is ln(x) and "m" is ln(y).
+#   all finite pairs:           n, Σu, Σu², Σu³, Σu⁴, Σv, Σuv, Σu²v, Σv²
+#   pairs with x > 0:           Σ1, Σl, Σl², Σv, Σlv, Σv²
+#   pairs with x > 0 and y > 0: Σ1, Σl, Σl², Σm, Σlm, Σm², Σv, Σv²
+SUM_NAMES = (
+    "n", "u", "uu", "uuu", "uuuu", "v", "uv", "uuv", "vv",
+    "log_n", "log_l", "log_ll", "log_v", "log_lv", "log_vv",
+    "power_n", "power_l", "power_ll", "power_m", "power_lm", "power_mm", "power_v", "power_vv",
+)
+SUM_INDEX = {name: position for position, name in enumerate(SUM_NAMES)}
+
+FIT_CACHE_SIZE = 256
+
+
+class CurveFit(NamedTuple):
+    """
+    One fitted curve: its model, coefficients and R².
+
+    Coefficients are (slope, intercept) for "linear" and "log" (y = slope * ln(x) + intercept), the
+    highest degree first for "poly" (like np.polyfit) and (a, b) for "power" (y = a * x^b).
+    """
+
+    model: str
+    coefficients: tuple
+    r_squared: float
+
+    def predict(self, x: np.ndarray) -> np.ndarray:
+        """
+        Evaluates the curve at `x`; log and power curves are missing (NaN) where x is not positive.
+        """
+        x = np.asarray(x, dtype=float)
+        if self.model == "linear":
+            slope, intercept = self.coefficients
+            return slope * x + intercept
+        if self.model == "poly":
+            return np.polyval(self.coefficients, x)
+        positive = x > 0
+        log_x = np.log(x, out=np.full(x.shape, np.nan), where=positive)
+        if self.model == "log":
+            slope, intercept = self.coefficients
+            return slope * log_x + intercept
+        a, b = self.coefficients
+        return a * np.exp(b * log_x)
+
+    @property
+    def equation(self) -> str:
+        if self.model == "linear":
+            return f"y = {self.coefficients[0]:.2f}x + {self.coefficients[1]:.2f}"
+        if self.model == "log":
+            return f"y = {self.coefficients[0]:.2f} * ln(x) + {self.coefficients[1]:.2f}"
+        if self.model == "poly":
+            return " + ".join(f"{coeff:.2f}x^{i}" for i, coeff in enumerate(self.coefficients[::-1]))
+        return f"y = {self.coefficients[0]:.2f} * x^{self.coefficients[1]:.2f}"
+
+
+class FitStatistics:
+    """
+    Running sufficient statistics of (x, y) pairs, from which the linear, log, degree 2 polynomial and power
+    fits and their R² are derived without going back to the data.
+
+    Every sum is gathered in one pass over the pairs. Pairs with a missing value are ignored, and the log and
+    power fits only use the pairs they are defined for (x > 0, and y > 0 for power) instead of producing NaNs.
+    Pairs can be added and removed again, so the statistics can follow a changing set of rows.
+
+    Args:
+        center_x (float): Shift applied to x before it is summed.
+        scale_x (float): Scale applied to x after the shift.
+        center_y (float): Shift applied to y before it is summed.
+    """
+
+    def __init__(self, center_x: float = 0.0, scale_x: float = 1.0, center_y: float = 0.0):
+        self.center_x = center_x
+        self.scale_x = scale_x
+        self.center_y = center_y
+        self.sums = np.zeros(len(SUM_NAMES))
+
+    @classmethod
+    def from_values(cls, x: np.ndarray, y: np.ndarray) -> "FitStatistics":
+        """
+        Builds the statistics of some pairs, centered on their means.
+        """
+        x = np.asarray(x, dtype=float)
+        y = np.asarray(y, dtype=float)
+        valid = np.isfinite(x) & np.isfinite(y)
+        center_x, scale_x, center_y = 0.0, 1.0, 0.0
+        if valid.any():
+            center_x = float(x[valid].mean())
+            scale_x = float(x[valid].std()) or 1.0
+            center_y = float(y[valid].mean())
+        statistics = cls(center_x, scale_x, center_y)
+        statistics.add(x, y)
+        return statistics
+
+    def moments(self, x: np.ndarray, y: np.ndarray) -> np.ndarray:
+        """
+        Returns the sums of some pairs, laid out like self.sums.
+        """
+        x = np.asarray(x, dtype=float)
+        y = np.asarray(y, dtype=float)
+        valid = np.isfinite(x) & np.isfinite(y)
+        x = x[valid]
+        y = y[valid]
+        u = (x - self.center_x) / self.scale_x
+        v = y - self.center_y
+        uu = u * u
+
+        positive_x = x > 0
+        log_x = np.log(x[positive_x])
+        log_v = v[positive_x]
+        positive_y = y[positive_x] > 0
+        power_l = log_x[positive_y]
+        power_m = np.log(y[positive_x][positive_y])
+        power_v = log_v[positive_y]
+
+        return np.array([
+            len(u), u.sum(), uu.sum(), (uu * u).sum(), (uu * uu).sum(), v.sum(), u @ v, uu @ v, v @ v,
+            len(log_x), log_x.sum(), log_x @ log_x, log_v.sum(), log_x @ log_v, log_v @ log_v,
+            len(power_l), power_l.sum(), power_l @ power_l, power_m.sum(), power_l @ power_m, power_m @ power_m,
+            power_v.sum(), power_v @ power_v,
+        ])
+
+    def add(self, x: np.ndarray, y: np.ndarray):
+        self.sums += self.moments(x, y)
+
+    def remove(self, x: np.ndarray, y: np.ndarray):
+        self.sums -= self.moments(x, y)
+
+    def _sum(self, name: str) -> float:
+        return self.sums[SUM_INDEX[name]]
+
+    def _simple_regression(self, prefix: str, x_name: str, y_name: str) -> tuple:
+        # Slope, intercept and R² of a least squares line through the pairs counted under `prefix`
+        n = self._sum(f"{prefix}n")
+        if n < 2:
+            return None
+        sum_x, sum_y = self._sum(f"{prefix}{x_name}"), self._sum(f"{prefix}{y_name}")
+        s_xx = self._sum(f"{prefix}{x_name}{x_name}") - sum_x * sum_x / n
+        s_yy = self._sum(f"{prefix}{y_name}{y_name}") - sum_y * sum_y / n
+        s_xy = self._sum(f"{prefix}{x_name}{y_name}") - sum_x * sum_y / n
+        if s_xx <= 0:
+            return None
+        slope = s_xy / s_xx
+        intercept = (sum_y - slope * sum_x) / n
+        r_squared = s_xy * s_xy / (s_xx * s_yy) if s_yy > 0 else np.nan
+        return slope, intercept, r_squared
+
+    def _linear(self) -> CurveFit:
+        regression = self._simple_regression("", "u", "v")
+        if regression is None:
+            return None
+        slope, intercept, r_squared = regression
+        slope = slope / self.scale_x
+        return CurveFit("linear", (float(slope), float(intercept + self.center_y - slope * self.center_x)), float(r_squared))
+
+    def _log(self) -> CurveFit:
+        regression = self._simple_regression("log_", "l", "v")
+        if regression is None:
+            return None
+        slope, intercept, r_squared = regression
+        return CurveFit("log", (float(slope), float(intercept + self.center_y)), float(r_squared))
+
+    def _poly(self) -> CurveFit:
+        n = self._sum("n")
+        if n < 3:
+            return None
+        s = [n, self._sum("u"), self._sum("uu"), self._sum("uuu"), self._sum("uuuu")]
+        normal_matrix = np.array([[s[0], s[1], s[2]], [s[1], s[2], s[3]], [s[2], s[3], s[4]]])
+        moments = np.array([self._sum("v"), self._sum("uv"), self._sum("uuv")])
+        try:
+            beta = np.linalg.solve(normal_matrix, moments)
+        except np.linalg.LinAlgError:
+            return None
+        if not np.isfinite(beta).all():
+            return None
+        ss_tot = self._sum("vv") - moments[0] * moments[0] / n
+        ss_res = self._sum("vv") - beta @ moments
+        r_squared = 1 - ss_res / ss_tot if ss_tot > 0 else np.nan
+
+        # Back from u = (x - center_x) / scale_x to x
+        c, k = self.center_x, self.scale_x
+        a2 = beta[2] / (k * k)
+        a1 = beta[1] / k - 2 * beta[2] * c / (k * k)
+        a0 = beta[0] - beta[1] * c / k + beta[2] * c * c / (k * k) + self.center_y
+        return CurveFit("poly", (float(a2), float(a1), float(a0)), float(r_squared))
+
+    def _power(self, x: np.ndarray = None, y: np.ndarray = None) -> CurveFit:
+        regression = self._simple_regression("power_", "l", "m")
+        if regression is None:
+            return None
+        b, log_a, _ = regression
+        a = float(np.exp(log_a))
+        r_squared = np.nan
+        if x is not None:
+            r_squared = self.power_r_squared(a, b, x, y)
+        return CurveFit("power", (a, float(b)), float(r_squared))
+
+    def power_r_squared(self, a: float, b: float, x: np.ndarray, y: np.ndarray) -> float:
+        """
+        Returns the R² of y = a * x^b in the original (not log) space. The residuals depend on the fitted
+        curve, so this takes one more pass over the pairs the statistics were gathered from.
+        """
+        x = np.asarray(x, dtype=float)
+        y = np.asarray(y, dtype=float)
+        used = np.isfinite(x) & np.isfinite(y) & (x > 0) & (y > 0)
+        residuals = y[used] - a * np.exp(b * np.log(x[used]))
+        n = self._sum("power_n")
+        ss_tot = self._sum("power_vv") - self._sum("power_v") ** 2 / n
+        return 1 - (residuals @ residuals) / ss_tot if ss_tot > 0 else np.nan
+
+    def fits(self, x: np.ndarray = None, y: np.ndarray = None) -> dict:
+        """
+        Derives every fit from the statistics.
+
+        Args:
+            x (np.ndarray, optional): The pairs' x values, for the power fit's R².
+            y (np.ndarray, optional): The pairs' y values.
+
+        Returns:
+            dict: Maps each of FIT_MODELS to its CurveFit, or None when the pairs don't determine it. Without
+                  x and y the power fit's R² is NaN.
+        """
+        return {
+            "linear": self._linear(),
+            "log": self._log(),
+            "poly": self._poly(),
+            "power": self._power(x, y),
+        }
+
+
+def fit_curves(x: np.ndarray, y: np.ndarray) -> dict:
+    """
+    Fits the linear, log, polynomial and power curves of a scatter graph.
+
+    Args:
+        x (np.ndarray): The x values.
+        y (np.ndarray): The y values.
+
+    Returns:
+        dict: Maps each of FIT_MODELS to its CurveFit (None when it can't be fitted).
+    """
+    return FitStatistics.from_values(x, y).fits(x, y)
+
+
+def values_digest(values: np.ndarray) -> str:
+    """
+    Returns a content hash of a column's values, for fit cache keys.
+    """
+    return hashlib.sha256(memoryview(np.ascontiguousarray(values, dtype=float))).hexdigest()
+
+
+def fit_cache_key(parts: list, mask: np.ndarray = None) -> str:
+    """
+    Builds a fit cache key from JSON serializable parts (e.g. the feature pair and values_digest of their
+    columns) and the rows a filter mask keeps.
+    """
+    digest = hashlib.blake2b(json.dumps(list(parts)).encode(), digest_size=16)
+    if mask is not None:
+        digest.update(np.packbits(mask).tobytes())
+    return digest.hexdigest()
+
+
+_fit_cache = OrderedDict()
+_fit_cache_lock = threading.Lock()
+
+
+def cached_fit_curves(key: str, x: np.ndarray, y: np.ndarray, statistics: FitStatistics = None) -> dict:
+    """
+    fit_curves, remembering the last FIT_CACHE_SIZE results by key (see fit_cache_key).
+
+    Args:
+        key (str): The cache key of the pairs.
+        x (np.ndarray): The x values.
+        y (np.ndarray): The y values.
+        statistics (FitStatistics, optional): Statistics already gathered from exactly these pairs; only the
+                                              power fit's R² then reads the pairs again.
+
+    Returns:
+        dict: Maps each of FIT_MODELS to its CurveFit (None when it can't be fitted).
+    """
+    with _fit_cache_lock:
+        fits = _fit_cache.get(key)
+        if fits is not None:
+            _fit_cache.move_to_end(key)
+            return fits
+    fits = statistics.fits(x, y) if statistics is not None else fit_curves(x, y)
+    with _fit_cache_lock:
+        _fit_cache[key] = fits
+        while len(_fit_cache) > FIT_CACHE_SIZE:
+            _fit_cache.popitem(last=False)
+    return fits
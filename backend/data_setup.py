@@ -1,21 +1,17 @@
 from backend.Class import Ops
 from datetime import date, time, datetime, timedelta
+import numpy as np
 
 def calculate_user_predictions(df, lower_prediction_column_str, upper_prediction_column_str, slider_percentage):
     percentage = slider_percentage / 100.0
-    user_predictions = []
-    for index, row in df.iterrows():
-        regular_model = row[lower_prediction_column_str]
-        shock_model = row[upper_prediction_column_str]
-        abs_difference = abs(shock_model - regular_model)
-        if shock_model > regular_model:
-            prediction = regular_model + (abs_difference * percentage)
-        else:
-            prediction = shock_model + (abs_difference * percentage)
-        user_predictions.append(prediction)
-    return user_predictions
+    regular_model = df[lower_prediction_column_str].to_numpy(dtype=float)
+    shock_model = df[upper_prediction_column_str].to_numpy(dtype=float)
+    abs_difference = np.abs(shock_model - regular_model)
+    # Start from the lower of the two models (the shock model when they are equal or a value is missing)
+    # and move towards the other one by the slider percentage
+    return np.where(shock_model > regular_model, regular_model, shock_model) + abs_difference * percentage
 
-def setup_data():
+def setup_data(compact: bool = False):
 
     start_date = "2024-12-15"
     end_date = "2024-12-31"
@@ -28,7 +24,7 @@ def setup_data():
         "NYIS pjm DA regular prediction",
     ]
     
-    actual = Ops()
+    actual = Ops(compact)
     actual.update_data_features(features_list)
     actual.update_date_range(start_date, end_date)
     actual.update_df()
@@ -0,0 +1,216 @@
+import json
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+
+# Created feature equations are lists of terms evaluated left to right, e.g.
+# [
+#     {"Feature": "MISO pjm RT"},                                   (first term has no operation)
+#     {"Feature": "MISO pjm DA", "Operation": "-"},
+#     {"Constant": 2, "Operation": "*"},
+#     {"Feature": "PJM miso DA", "Operation": "+", "Lag": 24},      (value 24 rows earlier)
+#     {"Feature": "PJM miso RT", "Operation": "/", "Rolling": 24, "Aggregate": "mean"},
+# ]
+OPERATIONS = ("+", "-", "*", "/")
+AGGREGATES = ("mean", "sum", "min", "max", "std")
+
+
+def equation_features(equation: list) -> list:
+    """
+    Returns the names of the features an equation reads.
+    """
+    return [term["Feature"] for term in equation if "Feature" in term]
+
+
+def equation_lookback(equation: list) -> int:
+    """
+    Returns how many earlier rows an equation reads through its lags and rolling windows, i.e. how many
+    rows before the first one to compute have to be included for the values to match a full evaluation.
+    """
+    lookback = 0
+    for term in equation:
+        # Lags are applied before the rolling window, so a term reads Lag + Rolling - 1 rows back
+        rows = int(term.get("Lag") or 0)
+        if term.get("Rolling"):
+            rows += int(term["Rolling"]) - 1
+        lookback = max(lookback, rows)
+    return lookback
+
+
+def describe_term(term: dict) -> str:
+    """
+    Returns a readable name for one equation term, used to name created features.
+    """
+    name = term["Feature"] if "Feature" in term else f"{term['Constant']:g}"
+    if term.get("Lag"):
+        name = f"{name} (lag {term['Lag']})"
+    if term.get("Rolling"):
+        name = f"{name} (rolling {term.get('Aggregate', 'mean')} {term['Rolling']})"
+    return name
+
+
+def _term_node(term: dict) -> tuple:
+    if "Feature" in term:
+        node = ("col", term["Feature"])
+    else:
+        node = ("const", float(term["Constant"]))
+    if term.get("Lag"):
+        node = ("lag", node, int(term["Lag"]))
+    if term.get("Rolling"):
+        aggregate = term.get("Aggregate", "mean")
+        if aggregate not in AGGREGATES:
+            raise ValueError(f"Unknown rolling aggregate {aggregate!r}")
+        node = ("roll", node, int(term["Rolling"]), aggregate)
+    return node
+
+
+def _linear_node(terms: list) -> tuple:
+    # Terms stay in the order they are written, so the sum is evaluated left to right like the equation
+    if len(terms) == 1 and terms[0][1] == 1.0:
+        return terms[0][0]
+    return ("lin", tuple(terms))
+
+
+def _sorted_terms(coefficients: dict) -> tuple:
+    return tuple(sorted(((node, coefficient) for node, coefficient in coefficients.items() if coefficient), key=repr))
+
+
+@lru_cache(maxsize=4096)
+def canonical_key(node: tuple) -> tuple:
+    """
+    Returns the key an expression node is cached under: linear combinations have their repeated terms merged
+    and their terms sorted, so "a - b + c" and "a + c - b" share one key while each is still evaluated in its
+    own order.
+    """
+    if node[0] == "lin":
+        coefficients = {}
+        for child, coefficient in node[1]:
+            child = canonical_key(child)
+            coefficients[child] = coefficients.get(child, 0.0) + coefficient
+        return ("lin", _sorted_terms(coefficients))
+    if node[0] in ("lag", "roll"):
+        return (node[0], canonical_key(node[1]), *node[2:])
+    if node[0] in ("mul", "div"):
+        return (node[0], canonical_key(node[1]), canonical_key(node[2]))
+    return node
+
+
+def _negated(key: tuple) -> tuple:
+    if key[0] != "lin":
+        return None
+    return ("lin", _sorted_terms({child: -coefficient for child, coefficient in key[1]}))
+
+
+def compile_equation(equation: list) -> tuple:
+    """
+    Compiles an equation into a hashable expression graph.
+
+    Runs of + and - are folded into one linear-combination node, keeping the order of their terms. Equal
+    sub-expressions (and exact negations such as "a - b" versus "b - a") are recognised through their
+    canonical_key and shared between features. Raises ValueError for unknown operations or aggregates.
+
+    Args:
+        equation (list): The created feature's list of terms.
+
+    Returns:
+        tuple: The root node of the expression graph.
+    """
+    return _compile(json.dumps(equation, sort_keys=True))
+
+
+@lru_cache(maxsize=256)
+def _compile(equation_json: str) -> tuple:
+    equation = json.loads(equation_json)
+    terms = [(_term_node(equation[0]), 1.0)]
+    for term in equation[1:]:
+        operation = term.get("Operation")
+        if operation not in OPERATIONS:
+            raise ValueError(f"Unknown operation {operation!r}")
+        if operation in ("+", "-"):
+            terms.append((_term_node(term), 1.0 if operation == "+" else -1.0))
+        else:
+            node = ("mul" if operation == "*" else "div", _linear_node(terms), _term_node(term))
+            terms = [(node, 1.0)]
+    return _linear_node(terms)
+
+
+class ExpressionEvaluator:
+    """
+    Evaluates compiled expression graphs over the columns of one dataframe.
+
+    Every node is computed once per evaluator with NumPy ufuncs writing into a single output buffer, and its
+    result is kept under its canonical_key so features sharing sub-expressions (or that are exact negations of
+    each other) reuse it. Cached arrays are never written to again.
+
+    Args:
+        df (pd.DataFrame): The frame whose columns the expressions read.
+    """
+
+    def __init__(self, df: pd.DataFrame):
+        self.df = df
+        self.index = df.index
+        self.cache = {}
+
+    def evaluate(self, node: tuple) -> np.ndarray:
+        key = canonical_key(node)
+        result = self.cache.get(key)
+        if result is not None:
+            return result
+
+        negated = _negated(key)
+        if negated is not None and negated in self.cache:
+            result = np.negative(self.cache[negated])
+        else:
+            with np.errstate(divide="ignore", invalid="ignore"):
+                result = getattr(self, f"_{node[0]}")(*node[1:])
+        self.cache[key] = result
+        return result
+
+    def _col(self, name: str) -> np.ndarray:
+        return self.df[name].to_numpy()
+
+    def _const(self, value: float) -> np.ndarray:
+        return np.full(len(self.index), value)
+
+    def _lag(self, child: tuple, periods: int) -> np.ndarray:
+        values = self.evaluate(child)
+        out = np.full(len(values), np.nan, dtype=np.result_type(values, np.float32))
+        if periods < len(values):
+            out[periods:] = values[: len(values) - periods]
+        return out
+
+    def _roll(self, child: tuple, window: int, aggregate: str) -> np.ndarray:
+        rolling = pd.Series(self.evaluate(child)).rolling(window)
+        return getattr(rolling, aggregate)().to_numpy()
+
+    def _lin(self, terms: tuple) -> np.ndarray:
+        out = None
+        for child, coefficient in terms:
+            values = self.evaluate(child)
+            if out is None:
+                out = np.multiply(values, coefficient) if coefficient != 1.0 else values.copy()
+            elif coefficient == 1.0:
+                np.add(out, values, out=out)
+            elif coefficient == -1.0:
+                np.subtract(out, values, out=out)
+            elif coefficient != 0.0:
+                out += values * coefficient
+        return out
+
+    def _mul(self, left: tuple, right: tuple) -> np.ndarray:
+        return np.multiply(self.evaluate(left), self.evaluate(right))
+
+    def _div(self, left: tuple, right: tuple) -> np.ndarray:
+        return np.divide(self.evaluate(left), self.evaluate(right))
+
+
+def cumulative_sum(values: np.ndarray) -> np.ndarray:
+    """
+    Cumulative sum that skips missing values and leaves them missing, like pd.Series.cumsum.
+    """
+    missing = np.isnan(values)
+    out = np.nancumsum(values)
+    out[missing] = np.nan
+    return out
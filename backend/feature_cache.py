@@ -0,0 +1,306 @@
+import contextlib
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, List, Tuple
+
+import numpy as np
+import pandas as pd
+
+
+DEFAULT_CACHE_PATH = os.path.join(
+    os.path.expanduser("~"), ".cache", "model_analysis_dashboard", "feature_values.sqlite"
+)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS feature_values (
+    feature TEXT NOT NULL,
+    ts INTEGER NOT NULL,
+    value REAL,
+    PRIMARY KEY (feature, ts)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS feature_coverage (
+    feature TEXT NOT NULL,
+    start_ts INTEGER NOT NULL,
+    end_ts INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS feature_coverage_feature ON feature_coverage (feature);
+CREATE TABLE IF NOT EXISTS cache_meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+HOUR = 3600
+
+# Hours newer than this many hours ago may still be revised (forecasts are republished until the hour has passed,
+# actuals get corrected), so their values are stored but not marked as covered and are requested again next time
+DEFAULT_SETTLE_HOURS = 48
+
+
+def merge_intervals(intervals: List[Tuple[int, int]], step: int = HOUR) -> List[Tuple[int, int]]:
+    """
+    Merges overlapping or adjacent (within one step) closed intervals.
+
+    Args:
+        intervals (List[Tuple[int, int]]): Closed (start, end) intervals in epoch seconds.
+        step (int): Distance between two consecutive points of the grid.
+
+    Returns:
+        List[Tuple[int, int]]: The sorted, merged intervals.
+    """
+    merged = []
+    for start, end in sorted(intervals):
+        if merged and start <= merged[-1][1] + step:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def subtract_intervals(start: int, end: int, covered: List[Tuple[int, int]], step: int = HOUR) -> List[Tuple[int, int]]:
+    """
+    Returns the parts of the closed interval [start, end] that are not covered.
+
+    Args:
+        start (int): Start of the requested interval in epoch seconds.
+        end (int): End of the requested interval in epoch seconds.
+        covered (List[Tuple[int, int]]): Sorted, merged intervals that are already available.
+        step (int): Distance between two consecutive points of the grid.
+
+    Returns:
+        List[Tuple[int, int]]: The missing closed intervals, in order.
+    """
+    gaps = []
+    cursor = start
+    for covered_start, covered_end in covered:
+        if covered_end < cursor:
+            continue
+        if covered_start > end:
+            break
+        if covered_start > cursor:
+            gaps.append((cursor, covered_start - step))
+        cursor = max(cursor, covered_end + step)
+        if cursor > end:
+            break
+    if cursor <= end:
+        gaps.append((cursor, end))
+    return gaps
+
+
+class FeatureCache:
+    """
+    A local, persistent cache of hourly feature values backed by SQLite.
+
+    Values are stored one row per (feature, hour), so any subset of features and hours can be read back
+    without touching the rest. Next to the values the cache keeps, per feature, the hour ranges that have
+    already been fetched from Quantum Zero, which is what the gap computation works on. Only hours older than
+    the settle window are recorded as fetched; newer ones, and ranges passed to invalidate, are fetched again.
+
+    Args:
+        path (str): Location of the SQLite database. Defaults to ~/.cache/model_analysis_dashboard.
+        timezone (str): Timezone the naive request hours are expressed in.
+        settle_hours (float): Hours after which a value is assumed final. Defaults to DEFAULT_SETTLE_HOURS.
+    """
+
+    def __init__(self, path: str = DEFAULT_CACHE_PATH, timezone: str = "EST", settle_hours: float = DEFAULT_SETTLE_HOURS):
+        self.path = path
+        self.timezone = timezone
+        self.settle_hours = settle_hours
+        self._lock = threading.Lock()
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._connect() as connection:
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.executescript(_SCHEMA)
+
+    @contextlib.contextmanager
+    def _connect(self):
+        # One transaction on a connection that is closed afterwards (sqlite3's own context manager only commits)
+        with contextlib.closing(sqlite3.connect(self.path, timeout=30)) as connection:
+            with connection:
+                yield connection
+
+    def _to_epoch(self, timestamp) -> int:
+        timestamp = pd.Timestamp(timestamp)
+        if timestamp.tzinfo is None:
+            timestamp = timestamp.tz_localize(self.timezone)
+        return int(timestamp.timestamp())
+
+    def _index_to_epoch(self, index: pd.DatetimeIndex) -> np.ndarray:
+        if index.tz is None:
+            index = index.tz_localize(self.timezone)
+        return index.tz_convert("UTC").tz_localize(None).values.astype("datetime64[s]").astype(np.int64)
+
+    def coverage(self, feature: str) -> List[Tuple[int, int]]:
+        """
+        Returns the merged epoch-second intervals already fetched for a feature.
+        """
+        with self._connect() as connection:
+            rows = connection.execute(
+                "SELECT start_ts, end_ts FROM feature_coverage WHERE feature = ?", (feature,)
+            ).fetchall()
+        return merge_intervals(rows)
+
+    def missing_ranges(self, start_hour, end_hour, features: List[str]) -> Dict[Tuple[int, int], List[str]]:
+        """
+        Computes which (feature, hour range) pairs still have to be requested from the server.
+
+        Args:
+            start_hour: First requested hour (naive, in the cache timezone).
+            end_hour: Last requested hour, inclusive.
+            features (List[str]): Database names of the requested features.
+
+        Returns:
+            dict: Maps each missing (start, end) epoch-second range to the features missing it, so features
+                  sharing a gap can be requested together.
+        """
+        start = self._to_epoch(start_hour)
+        end = self._to_epoch(end_hour)
+        gaps = {}
+        for feature in features:
+            for gap in subtract_intervals(start, end, self.coverage(feature)):
+                gaps.setdefault(gap, []).append(feature)
+        return gaps
+
+    def epoch_to_local(self, seconds: int) -> pd.Timestamp:
+        """
+        Converts an epoch-second bound back to a naive hour in the cache timezone.
+        """
+        return pd.Timestamp(seconds, unit="s", tz="UTC").tz_convert(self.timezone).tz_localize(None)
+
+    def store(self, df: pd.DataFrame, start_hour, end_hour, features: List[str]):
+        """
+        Writes a fetched dataframe into the cache and records what range it covers.
+
+        Coverage is only recorded up to the last hour the server returned for each feature, so hours that
+        have not been published yet are requested again next time instead of being cached as empty, and only
+        for hours older than the settle window, so values that may still be revised are requested again too.
+
+        Args:
+            df (pd.DataFrame): Parsed response with one column per feature database name.
+            start_hour: First requested hour (naive, in the cache timezone).
+            end_hour: Last requested hour, inclusive.
+            features (List[str]): Database names of the features that were requested.
+        """
+        start = self._to_epoch(start_hour)
+        settled = int(time.time() - self.settle_hours * HOUR)
+        end = min(self._to_epoch(end_hour), settled - settled % HOUR)
+        ts = self._index_to_epoch(pd.DatetimeIndex(df.index)) if not df.empty else np.array([], dtype=np.int64)
+        with self._lock, self._connect() as connection:
+            if not df.empty:
+                connection.execute(
+                    "INSERT OR REPLACE INTO cache_meta (key, value) VALUES ('timezone', ?)",
+                    ("" if df.index.tz is None else str(df.index.tz),),
+                )
+            for feature in features:
+                if feature not in df.columns:
+                    continue
+                values = df[feature].to_numpy(dtype=np.float64)
+                present = ~np.isnan(values)
+                if not present.any():
+                    continue
+                values = np.where(present, values, None)
+                connection.executemany(
+                    "INSERT OR REPLACE INTO feature_values (feature, ts, value) VALUES (?, ?, ?)",
+                    zip([feature] * len(ts), ts.tolist(), values.tolist()),
+                )
+                last = min(end, int(ts[present].max()))
+                if last >= start:
+                    connection.execute(
+                        "INSERT INTO feature_coverage (feature, start_ts, end_ts) VALUES (?, ?, ?)",
+                        (feature, start, last),
+                    )
+                    self._compact_coverage(connection, feature)
+
+    def _compact_coverage(self, connection: sqlite3.Connection, feature: str):
+        rows = connection.execute(
+            "SELECT start_ts, end_ts FROM feature_coverage WHERE feature = ?", (feature,)
+        ).fetchall()
+        merged = merge_intervals(rows)
+        if len(merged) != len(rows):
+            connection.execute("DELETE FROM feature_coverage WHERE feature = ?", (feature,))
+            connection.executemany(
+                "INSERT INTO feature_coverage (feature, start_ts, end_ts) VALUES (?, ?, ?)",
+                [(feature, merged_start, merged_end) for merged_start, merged_end in merged],
+            )
+
+    def load(self, start_hour, end_hour, features: List[str]) -> pd.DataFrame:
+        """
+        Reads the cached values of the requested features and hours back into a dataframe.
+
+        The result has the same shape as a parsed Quantum Zero response: a "datetime" index and one column
+        per feature that has values in the range, in the requested order.
+        """
+        start = self._to_epoch(start_hour)
+        end = self._to_epoch(end_hour)
+        placeholders = ",".join("?" * len(features))
+        with self._connect() as connection:
+            rows = connection.execute(
+                f"SELECT feature, ts, value FROM feature_values "
+                f"WHERE feature IN ({placeholders}) AND ts BETWEEN ? AND ?",
+                (*features, start, end),
+            ).fetchall()
+            timezone = connection.execute("SELECT value FROM cache_meta WHERE key = 'timezone'").fetchone()
+        if not rows:
+            return pd.DataFrame()
+
+        names, ts, values = zip(*rows)
+        ts = np.asarray(ts, dtype=np.int64)
+        values = np.asarray(values, dtype=np.float64)
+        present = [feature for feature in features if feature in set(names)]
+        column_codes = pd.Index(present).get_indexer(names)
+        index_values, row_codes = np.unique(ts, return_inverse=True)
+
+        matrix = np.full((len(index_values), len(present)), np.nan)
+        matrix[row_codes, column_codes] = values
+
+        index = pd.DatetimeIndex(pd.to_datetime(index_values, unit="s", utc=True), name="datetime")
+        timezone = timezone[0] if timezone else self.timezone
+        if timezone:
+            index = index.tz_convert(timezone)
+        else:
+            index = index.tz_convert(self.timezone).tz_localize(None)
+        return pd.DataFrame(matrix, index=index, columns=present)
+
+    def invalidate(self, start_hour, end_hour, features: List[str]):
+        """
+        Forgets the cached values of features over a range of hours, so they are requested again, e.g. to
+        pick up values revised on the server.
+
+        Args:
+            start_hour: First hour to forget (naive, in the cache timezone).
+            end_hour: Last hour to forget, inclusive.
+            features (List[str]): Database names of the features to forget.
+        """
+        start = self._to_epoch(start_hour)
+        end = self._to_epoch(end_hour)
+        with self._lock, self._connect() as connection:
+            for feature in features:
+                rows = connection.execute(
+                    "SELECT start_ts, end_ts FROM feature_coverage WHERE feature = ?", (feature,)
+                ).fetchall()
+                remaining = []
+                for covered_start, covered_end in merge_intervals(rows):
+                    if covered_start < start:
+                        remaining.append((covered_start, min(covered_end, start - HOUR)))
+                    if covered_end > end:
+                        remaining.append((max(covered_start, end + HOUR), covered_end))
+                connection.execute("DELETE FROM feature_coverage WHERE feature = ?", (feature,))
+                connection.executemany(
+                    "INSERT INTO feature_coverage (feature, start_ts, end_ts) VALUES (?, ?, ?)",
+                    [(feature, remaining_start, remaining_end) for remaining_start, remaining_end in remaining],
+                )
+                connection.execute(
+                    "DELETE FROM feature_values WHERE feature = ? AND ts BETWEEN ? AND ?", (feature, start, end)
+                )
+
+    def clear(self):
+        """
+        Removes every cached value and coverage record.
+        """
+        with self._lock, self._connect() as connection:
+            connection.execute("DELETE FROM feature_values")
+            connection.execute("DELETE FROM feature_coverage")
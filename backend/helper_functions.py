@@ -1,9 +1,10 @@
 import pandas as pd
 from datetime import datetime
 from backend.db_dictionaries import feature_units_dict
+from backend.endpoint_helper import TIMEZONE
+from backend.curve_fits import FIT_MODELS, fit_curves
+from backend.expressions import ExpressionEvaluator, compile_equation, cumulative_sum, equation_features
 import numpy as np
-from scipy.stats import linregress
-import plotly.express as px
 import plotly.graph_objects as go
 
 
@@ -43,155 +44,238 @@ def convert_dict_to_df(dict):
 
     return df
 
-def get_excluded_datetimes(
-    df, hour_filters, day_of_week_filters, month_filters, year_filters, feature_filters
-):
-    dates_to_exclude = []
-
-    for filter in feature_filters:
-        feature_name = filter["feature_name"]
-        min_value = filter["range"][0]
-        max_value = filter["range"][1]
-        min_value = float("-inf") if min_value is None else min_value
-        max_value = float("inf") if max_value is None else max_value
-        dates_to_exclude_series = df.index[
-            (df[feature_name] <= min_value) | (df[feature_name] >= max_value)
-        ]
-        dates_to_exclude.extend(dates_to_exclude_series.to_list())
-    dates_to_exclude = list(set(dates_to_exclude))
-
-    dates_to_exclude_series = df.index[
-        ~(df.index.hour.isin(hour_filters))
-        | ~(df.index.weekday.isin(day_of_week_filters))
-        | ~(df.index.month.isin(month_filters))
-        | ~(df.index.year.isin(year_filters))
-    ]
-    dates_to_exclude.extend(dates_to_exclude_series.to_list())
-    
-    # for idx, datetimes in enumerate(dates_to_exclude):
-    #     dates_to_exclude[idx] = datetimes.to_datetime64()
+def window_bounds(start_date, end_date, index: pd.DatetimeIndex):
+    """
+    Returns the first and last hour of a date window, expressed like the timestamps of `index`.
 
-    # print(dates_to_exclude)
-    dates_to_exclude = sorted(list(set(dates_to_exclude)))
-    
-    # print(dates_to_exclude)
-    return dates_to_exclude
+    Parameters:
+        start_date: First day of the window.
+        end_date: Last day of the window (inclusive, up to hour 23).
+        index (pd.DatetimeIndex): Index the bounds will be compared with. When it is timezone aware the
+                                  request-timezone hours are converted to its timezone.
+
+    Returns:
+        tuple: (lower_bound, upper_bound) timestamps.
+    """
+    lower_bound = pd.Timestamp(start_date).normalize()
+    upper_bound = pd.Timestamp(end_date).normalize() + pd.Timedelta(hours=23)
+    if getattr(index, "tz", None) is not None:
+        lower_bound = lower_bound.tz_localize(TIMEZONE).tz_convert(index.tz)
+        upper_bound = upper_bound.tz_localize(TIMEZONE).tz_convert(index.tz)
+    return lower_bound, upper_bound
+
+def get_feature_filter_mask(df, feature_filter):
+    """
+    Returns a boolean mask of the rows a feature filter keeps.
+
+    Rows are excluded when the feature's value is at or beyond either bound; a bound of None is open.
+
+    Parameters:
+        df (pd.DataFrame): The dataframe being filtered.
+        feature_filter (dict): A feature filter with "feature_name" and "range" keys.
+
+    Returns:
+        np.ndarray: A boolean array, True for the rows to keep.
+    """
+    feature_name = feature_filter["feature_name"]
+    min_value = feature_filter["range"][0]
+    max_value = feature_filter["range"][1]
+    min_value = float("-inf") if min_value is None else min_value
+    max_value = float("inf") if max_value is None else max_value
+    values = df[feature_name].to_numpy()
+    return ~((values <= min_value) | (values >= max_value))
 
 def get_feature_units(feature_name):
     return feature_units_dict[feature_name]
     
-def add_custom_feature_column(df: pd.DataFrame, custom_feature):
+def custom_feature_values(df: pd.DataFrame, custom_feature, evaluator: ExpressionEvaluator = None):
+    """
+    Evaluates a created feature's equation over the rows of a dataframe.
+
+    The equation is compiled once into an expression graph and evaluated with NumPy; pass the same
+    evaluator for several features over the same frame to share their common sub-expressions. The values
+    are not copied out of the evaluator, which never writes to them again, so they must not be written to.
+
+    Parameters:
+        df (pd.DataFrame): The frame holding the features the equation reads.
+        custom_feature (dict): An entry of Ops.created_features.
+        evaluator (ExpressionEvaluator, optional): Evaluator bound to `df`.
+
+    Returns:
+        np.ndarray: The feature's values (possibly an array the evaluator keeps), or None when one of its
+        inputs is not a column of `df`.
+    """
     available_features = df.columns.to_list()
-    for features in custom_feature["equation"]:
-        feature_name = features["Feature"]
+    for feature_name in equation_features(custom_feature["equation"]):
         if feature_name not in available_features:
-            return df
-        
-    custom_feature_series = pd.Series
-    for idx, features in enumerate(custom_feature["equation"]):
-        if idx == 0:
-            custom_feature_series = df[features["Feature"]]
-
-        elif features["Operation"] == '+':
-            custom_feature_series = custom_feature_series + df[features["Feature"]]
-
-        elif features["Operation"] == '-':
-            custom_feature_series = custom_feature_series - df[features["Feature"]]
-    
+            return None
+
+    if evaluator is None or evaluator.df is not df:
+        evaluator = ExpressionEvaluator(df)
+    values = evaluator.evaluate(compile_equation(custom_feature["equation"]))
+
     if custom_feature["cumulative?"]:
-        custom_feature_series = custom_feature_series.cumsum()
+        return cumulative_sum(values)
+    return values
 
-    df[custom_feature["feature_name"]] = custom_feature_series
+def add_custom_feature_column(df: pd.DataFrame, custom_feature, evaluator: ExpressionEvaluator = None):
+    """
+    Evaluates a created feature's equation and adds it to the dataframe as a column (see custom_feature_values).
+
+    Parameters:
+        df (pd.DataFrame): The frame holding the features the equation reads.
+        custom_feature (dict): An entry of Ops.created_features.
+        evaluator (ExpressionEvaluator, optional): Evaluator bound to `df`.
+
+    Returns:
+        pd.DataFrame: `df`, with the created feature added when all of its inputs are available.
+    """
+    values = custom_feature_values(df, custom_feature, evaluator)
+    if values is not None:
+        # A copy, as the column may be edited in place
+        df[custom_feature["feature_name"]] = values.copy()
 
     return df
 
+def extend_custom_feature_column(window: pd.DataFrame, custom_feature, start: int, previous_values: np.ndarray, evaluator: ExpressionEvaluator = None):
+    """
+    Adds a created feature to the last rows of a frame after rows were appended or replaced, computing only
+    the rows from `start` on.
+
+    The rows before `start` are there for the equation's lags and rolling windows (see equation_lookback) and
+    keep the values the feature already had; cumulative features continue from their last value.
+
+    Parameters:
+        window (pd.DataFrame): The last rows of the frame: its raw features and the created features extended so far.
+        custom_feature (dict): An entry of Ops.created_features.
+        start (int): Position in `window` of the first row to compute.
+        previous_values (np.ndarray): The feature's values for every row of the frame before that row.
+        evaluator (ExpressionEvaluator, optional): Evaluator bound to `window`.
+
+    Returns:
+        pd.DataFrame: `window`, with the created feature added when all of its inputs are available.
+    """
+    available_features = window.columns.to_list()
+    for feature_name in equation_features(custom_feature["equation"]):
+        if feature_name not in available_features:
+            return window
+
+    if evaluator is None or evaluator.df is not window:
+        evaluator = ExpressionEvaluator(window)
+    values = evaluator.evaluate(compile_equation(custom_feature["equation"]))[start:]
+
+    if custom_feature["cumulative?"]:
+        totals = previous_values[~np.isnan(previous_values)]
+        values = cumulative_sum(values) + (totals[-1] if len(totals) else 0.0)
+
+    window[custom_feature["feature_name"]] = np.concatenate([previous_values[len(previous_values) - start :], values])
+
+    return window
+
 def create_linear_best_fit(x, y, x_smooth):
-    slope, intercept, r_value, _, _ = linregress(x, y)
-    r_squared = r_value ** 2
-    # Generate the line of best fit equation
-    y_fit_smooth = slope * x_smooth + intercept
-    equation = f"y = {slope:.2f}x + {intercept:.2f}"
-    # print("Line of best fit:", equation)
-    return y_fit_smooth, equation, r_squared
+    return _best_fit("linear", x, y, x_smooth)
 
 def create_log_best_fit(x, y, x_smooth):
-    # Take the natural logarithm of x values
-    log_x = np.log(x)
-    # print(f'x value: {x}, y value: {y}')
-
-    # Perform linear regression on log(x) vs y
-    slope, intercept, r_value, _, _ = linregress(log_x, y)
-    r_squared = r_value ** 2
-    print(x_smooth)
-    y_fit_smooth = slope * np.log(x_smooth) + intercept
-    # Generate the logarithmic line of best fit equation
-    equation = f"y = {slope:.2f} * ln(x) + {intercept:.2f}"
-    # print("Logarithmic line of best fit:", equation)
-    return y_fit_smooth, equation, r_squared
+    # Only pairs with x > 0 are used, and the curve is missing where x_smooth is not positive
+    return _best_fit("log", x, y, x_smooth)
 
 def create_poly_best_fit(x, y, x_smooth):
-    degree = 2  # Change this to the desired polynomial degree
-    coefficients = np.polyfit(x, y, degree)
-    polynomial = np.poly1d(coefficients)
-    y_fit_smooth = polynomial(x_smooth)
-    y_fit = polynomial(x)
-    ss_res = np.sum((y - y_fit) ** 2)
-    ss_tot = np.sum((y - np.mean(y)) ** 2)
-    r_squared = 1 - (ss_res / ss_tot)
-    equation_terms = [f"{coeff:.2f}x^{i}" for i, coeff in enumerate(coefficients[::-1])]
-    equation = " + ".join(equation_terms)
-    # print("Polynomial line of best fit:", equation)
-    return y_fit_smooth, equation, r_squared
+    # Degree 2
+    return _best_fit("poly", x, y, x_smooth)
 
 def create_power_best_fit(x, y, x_smooth):
-    log_x = np.log(x)
-    log_y = np.log(y)
+    # Only pairs with x > 0 and y > 0 are used; R^2 is computed on y (not log y) over those pairs
+    return _best_fit("power", x, y, x_smooth)
+
+def _best_fit(model, x, y, x_smooth):
+    fit = fit_curves(np.asarray(x, dtype=float), np.asarray(y, dtype=float))[model]
+    if fit is None:
+        return np.full(len(x_smooth), np.nan), "", np.nan
+    return fit.predict(x_smooth), fit.equation, fit.r_squared
+
+# Scatter graphs with more points than this are drawn with WebGL (Scattergl) instead of SVG, as px.scatter did
+SCATTERGL_MIN_POINTS = 1_000
+# Scatter graphs with more points than this are drawn as a 2D histogram (point density) computed on the server
+DENSITY_MIN_POINTS = 200_000
+# Bins per axis of the density heatmap
+DENSITY_BINS = 200
+
+def scatter_render_mode(n_points):
+    """
+    Picks how a scatter graph with `n_points` points is drawn: "svg", "webgl" or "density".
+    """
+    if n_points > DENSITY_MIN_POINTS:
+        return "density"
+    if n_points > SCATTERGL_MIN_POINTS:
+        return "webgl"
+    return "svg"
 
-    # Perform linear regression on log(x) vs log(y)
-    slope, intercept, _, _, _ = linregress(log_x, log_y)
+def density_heatmap(x, y, bins=DENSITY_BINS):
+    """
+    Bins scatter points into a 2D histogram, drawn as a heatmap of how many points fall in each cell.
 
-    # Calculate the coefficients for the power function y = a * x^b
-    a = np.exp(intercept)  # a is e^intercept
-    b = slope  # b is the slope from the log-log regression
+    Parameters:
+        x (np.ndarray): The x values.
+        y (np.ndarray): The y values.
+        bins (int, optional): Bins per axis. Defaults to DENSITY_BINS.
 
-    y_fit_smooth = a * np.power(x_smooth, b)
+    Returns:
+        go.Heatmap: The heatmap, with empty cells left transparent.
+    """
+    valid = np.isfinite(x) & np.isfinite(y)
+    counts, x_edges, y_edges = np.histogram2d(x[valid], y[valid], bins=bins)
+    counts = np.where(counts > 0, counts, np.nan)
+    return go.Heatmap(
+        x=(x_edges[:-1] + x_edges[1:]) / 2,
+        y=(y_edges[:-1] + y_edges[1:]) / 2,
+        z=counts.T,
+        colorscale="Blues",
+        colorbar=dict(title="Points"),
+        name="Point density",
+        hovertemplate="x: %{x}<br>y: %{y}<br>points: %{z}<extra></extra>",
+    )
 
-    # Generate the power line of best fit equation
-    equation = f"y = {a:.2f} * x^{b:.2f}"
-    
-    # Calculate fitted y values using the power function
-    y_fit = a * np.power(x, b)
-    
-    # Calculate R^2
-    ss_res = np.sum((y - y_fit) ** 2)
-    ss_tot = np.sum((y - np.mean(y)) ** 2)
-    r_squared = 1 - (ss_res / ss_tot)
-    
-    # print("Power line of best fit:", equation)
-    return y_fit_smooth, equation, r_squared
+def create_scatter_plot_fig(df, fits: dict = None, render_mode: str = "auto"):
+    """
+    Builds a scatter graph of the first two columns of a dataframe, with the linear, log, polynomial and
+    power fits of the points drawn over it.
+
+    Large graphs are drawn with WebGL, and very large ones as a density heatmap binned on the server (see
+    scatter_render_mode), so the browser is not sent or asked to draw every point.
+
+    Parameters:
+        df (pd.DataFrame): The x feature in its first column and the y feature in its second.
+        fits (dict, optional): The fits to draw, as returned by fit_curves (e.g. cached by Ops.scatter_graph_fits).
+                               Computed from `df` when not given.
+        render_mode (str, optional): "svg", "webgl", "density" or "auto" to pick one from the number of points.
 
-def create_scatter_plot_fig(df):
+    Returns:
+        go.Figure: The scatter graph.
+    """
     features = list(df.columns.values)
-    x = df[features[0]]
-    y = df[features[1]]
-    print(x)
-    print(y)
-
-    x_smooth = np.linspace(x.min(), x.max(), 500)
-
-    linear_y_fit_smooth, linear_equation, linear_r_squared = create_linear_best_fit(x, y, x_smooth)
-    log_y_fit_smooth, log_equation, log_r_squared = create_log_best_fit(x, y, x_smooth)
-    poly_y_fit_smooth, poly_equation, poly_r_squared = create_poly_best_fit(x, y, x_smooth)
-    power_y_fit_smooth, power_equation, power_r_squared = create_power_best_fit(x, y, x_smooth)
-
-    # Add a single scatter trace for MISO pjm RT vs Meteologica MISO Load forecast
-    fig = px.scatter(
-        df,
-        x=features[0],
-        y=features[1],
-        # mode='markers',
-        # name=f'{features[0]} vs {features[1]})'
-    )
+    x = df[features[0]].to_numpy(dtype=float)
+    y = df[features[1]].to_numpy(dtype=float)
+    if fits is None:
+        fits = fit_curves(x, y)
+
+    x_smooth = np.linspace(np.nanmin(x), np.nanmax(x), 500) if np.isfinite(x).any() else np.array([])
+
+    if render_mode == "auto":
+        render_mode = scatter_render_mode(len(df))
+    if render_mode == "density":
+        points = density_heatmap(x, y)
+    else:
+        scatter = go.Scattergl if render_mode == "webgl" else go.Scatter
+        points = scatter(
+            x=x,
+            y=y,
+            mode="markers",
+            name=f"{features[0]} vs {features[1]}",
+            showlegend=False,
+            hovertemplate=f"{features[0]}=%{{x}}<br>{features[1]}=%{{y}}<extra></extra>",
+        )
+
+    fig = go.Figure(points)
 
     fig.update_layout(
         title=f'{features[0]} vs {features[1]}',
@@ -199,32 +283,17 @@ def create_scatter_plot_fig(df):
         yaxis_title=f'{features[1]}',
     )
 
-    fig.add_trace(go.Scatter(
-        x=x_smooth,
-        y=linear_y_fit_smooth,
-        mode='lines',
-        name=f'Linear Fit: {linear_equation}, R^2 = {linear_r_squared:.4f}'
-    ))
-
-    fig.add_trace(go.Scatter(
-        x=x_smooth,
-        y=log_y_fit_smooth,
-        mode='lines',
-        name=f'Logarithmic Fit: {log_equation}, R^2 = {log_r_squared:.4f}'
-    ))
-
-    fig.add_trace(go.Scatter(
-        x=x_smooth,
-        y=poly_y_fit_smooth,
-        mode='lines',
-        name=f'Polynomial Fit: {poly_equation}, R^2 = {poly_r_squared:.4f}'
-    ))
-
-    fig.add_trace(go.Scatter(
-        x=x_smooth,
-        y=power_y_fit_smooth,
-        mode='lines',
-        name=f'Power Fit: {power_equation}, R^2 = {power_r_squared:.4f}'
-    ))
+    fit_names = {"linear": "Linear Fit", "log": "Logarithmic Fit", "poly": "Polynomial Fit", "power": "Power Fit"}
+    for model in FIT_MODELS:
+        fit = fits.get(model)
+        # Curves the points don't determine (e.g. a log fit without positive x values) are left out
+        if fit is None or len(x_smooth) == 0:
+            continue
+        fig.add_trace(go.Scatter(
+            x=x_smooth,
+            y=fit.predict(x_smooth),
+            mode='lines',
+            name=f'{fit_names[model]}: {fit.equation}, R^2 = {fit.r_squared:.4f}'
+        ))
 
     return fig
\ No newline at end of file
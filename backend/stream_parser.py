@@ -0,0 +1,325 @@
+import json
+import re
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+
+# One JSON token, optionally preceded by whitespace. Strings keep their raw (still escaped) body.
+_TOKEN = re.compile(
+    rb'\s*(?:([{}\[\]:,])|"((?:[^"\\]|\\.)*)"|(-?(?:0|[1-9]\d*)(?:\.\d+)?(?:[eE][+-]?\d+)?)|(true|false|null))'
+)
+_WHITESPACE = re.compile(rb"\s*")
+# An object whose members are all scalars, e.g. one entry of "values". Matched in one go instead of token by token.
+_FLAT_OBJECT = re.compile(rb'(\{(?:[^{}\[\]"]|"(?:[^"\\]|\\.)*")*\})')
+_FLAT_OBJECT_PREFIX = re.compile(rb'\{(?:[^{}\[\]"]|"(?:[^"\\]|\\.)*")*')
+_DATETIME_FIELD = re.compile(rb'"datetime"\s*:\s*"((?:[^"\\]|\\.)*)"')
+_VALUE_FIELD = re.compile(rb'"value"\s*:\s*(-?(?:0|[1-9]\d*)(?:\.\d+)?(?:[eE][+-]?\d+)?)')
+_DELIMITERS = (b",", b"]", b"}", b" ", b"\n", b"\r", b"\t")
+
+_LITERALS = {b"true": True, b"false": False, b"null": None}
+
+STRING = "string"
+NUMBER = "number"
+LITERAL = "literal"
+
+
+class TokenStream:
+    """
+    Incrementally tokenizes a JSON document that arrives in byte chunks.
+
+    Only the current chunk (plus a token that straddles two chunks) is held in memory. Iterating yields
+    (kind, value) tuples where kind is one of the punctuation characters, STRING, NUMBER or LITERAL.
+
+    Args:
+        chunks (Iterable[bytes]): The document, e.g. requests.Response.iter_content().
+    """
+
+    def __init__(self, chunks: Iterable[bytes]):
+        self._chunks = iter(chunks)
+        self.buffer = b""
+        self.position = 0
+        self.eof = False
+
+    def _fill(self):
+        chunk = next(self._chunks, None)
+        if chunk is None:
+            self.eof = True
+        else:
+            self.buffer = self.buffer[self.position:] + chunk
+            self.position = 0
+
+    def __iter__(self):
+        return self
+
+    def __next__(self) -> Tuple[str, object]:
+        while True:
+            match = _TOKEN.match(self.buffer, self.position)
+            # A number or literal is only complete once the byte after it is a delimiter; "36" may be the
+            # start of "36.5" that continues in the next chunk.
+            if match is None or (
+                not self.eof
+                and match.group(1) is None
+                and match.group(2) is None
+                and self.buffer[match.end():match.end() + 1] not in _DELIMITERS
+            ):
+                if self.eof:
+                    if _WHITESPACE.match(self.buffer, self.position).end() == len(self.buffer):
+                        raise StopIteration
+                    raise ValueError(
+                        f"Invalid JSON near byte {self.position}: {self.buffer[self.position:self.position + 40]!r}"
+                    )
+                self._fill()
+                continue
+
+            self.position = match.end()
+            punctuation, string, number, literal = match.groups()
+            if punctuation is not None:
+                return punctuation.decode(), None
+            if string is not None:
+                if b"\\" in string:
+                    return STRING, json.loads(b'"' + string + b'"')
+                return STRING, string.decode()
+            if number is not None:
+                return NUMBER, number
+            return LITERAL, _LITERALS[literal]
+
+    def consume(self, character: bytes) -> bool:
+        """
+        Consumes the next non-whitespace byte if it is `character` and reports whether it did.
+        """
+        while True:
+            start = _WHITESPACE.match(self.buffer, self.position).end()
+            if start < len(self.buffer):
+                if self.buffer[start:start + 1] != character:
+                    return False
+                self.position = start + 1
+                return True
+            if self.eof:
+                return False
+            self._fill()
+
+    def next_flat_object(self) -> Optional[bytes]:
+        """
+        Consumes the next value if it is an object without nested objects or arrays and returns its raw bytes.
+
+        Returns None, without consuming anything, if the next value is anything else.
+        """
+        while True:
+            start = _WHITESPACE.match(self.buffer, self.position).end()
+            if start < len(self.buffer) and self.buffer[start:start + 1] != b"{":
+                return None
+            end = self.buffer.find(b"}", start)
+            if end != -1:
+                raw = self.buffer[start:end + 1]
+                # Fast path: with balanced quotes, no escapes and no nested containers the first "}" is the
+                # closing brace, so no regex is needed.
+                if raw.count(b'"') % 2 == 0 and b"\\" not in raw and b"{" not in raw[1:] and b"[" not in raw:
+                    self.position = end + 1
+                    return raw
+                match = _FLAT_OBJECT.match(self.buffer, start)
+                if match is not None:
+                    self.position = match.end()
+                    return match.group(1)
+                prefix_end = _FLAT_OBJECT_PREFIX.match(self.buffer, start).end()
+                # Stopped on a nested object or array rather than on a string cut off by the chunk boundary
+                if prefix_end < len(self.buffer) and self.buffer[prefix_end:prefix_end + 1] != b'"':
+                    return None
+            if self.eof:
+                return None
+            self._fill()
+
+
+def _expect(tokens: Iterator, kind: str):
+    token_kind, value = next(tokens)
+    if token_kind != kind:
+        raise ValueError(f"Expected {kind!r} but found {token_kind!r}")
+    return value
+
+
+def skip_value(first: Tuple[str, object], tokens: Iterator):
+    """
+    Consumes one JSON value without building it.
+    """
+    depth = 0
+    kind, _ = first
+    while True:
+        if kind in "{[":
+            depth += 1
+        elif kind in "}]":
+            depth -= 1
+        if depth == 0:
+            return
+        kind, _ = next(tokens)
+
+
+def iter_object(tokens: Iterator) -> Iterator[Tuple[str, Tuple[str, object]]]:
+    """
+    Iterates over the members of an object whose opening brace was already consumed.
+
+    Yields (key, first token of the value); the caller must consume the rest of the value before
+    advancing the iterator.
+    """
+    kind, key = next(tokens)
+    if kind == "}":
+        return
+    while True:
+        if kind != STRING:
+            raise ValueError("Expected an object key")
+        _expect(tokens, ":")
+        yield key, next(tokens)
+        kind, _ = next(tokens)
+        if kind == "}":
+            return
+        if kind != ",":
+            raise ValueError("Expected ',' or '}' in object")
+        kind, key = next(tokens)
+
+
+def iter_array(tokens: Iterator) -> Iterator[Tuple[str, object]]:
+    """
+    Iterates over the elements of an array whose opening bracket was already consumed.
+
+    Yields the first token of each element; the caller must consume the rest of the element before
+    advancing the iterator.
+    """
+    token = next(tokens)
+    if token[0] == "]":
+        return
+    while True:
+        yield token
+        kind, _ = next(tokens)
+        if kind == "]":
+            return
+        if kind != ",":
+            raise ValueError("Expected ',' or ']' in array")
+        token = next(tokens)
+
+
+class FeatureBuffer:
+    """
+    Preallocated NumPy storage for the (datetime, value) pairs of one feature.
+
+    Args:
+        capacity (int): Number of values expected, usually the number of requested hours.
+    """
+
+    def __init__(self, capacity: int):
+        capacity = max(capacity, 1)
+        self.datetimes = np.empty(capacity, dtype="S32")
+        self.values = np.empty(capacity, dtype=np.float64)
+        self.size = 0
+
+    def append(self, datetime: str, value: float):
+        if self.size == len(self.values):
+            self.datetimes = np.resize(self.datetimes, 2 * self.size)
+            self.values = np.resize(self.values, 2 * self.size)
+        if len(datetime) > self.datetimes.dtype.itemsize:
+            # Widen the storage rather than let NumPy truncate a longer timestamp (e.g. with nanoseconds)
+            self.datetimes = self.datetimes.astype(f"S{len(datetime)}")
+        self.datetimes[self.size] = datetime
+        self.values[self.size] = value
+        self.size += 1
+
+    def arrays(self) -> Tuple[np.ndarray, np.ndarray]:
+        return self.datetimes[: self.size].astype(str), self.values[: self.size]
+
+
+def _parse_values(tokens: TokenStream, buffer: FeatureBuffer):
+    if tokens.consume(b"]"):
+        return
+    while True:
+        raw = tokens.next_flat_object()
+        if raw is not None:
+            datetime = _DATETIME_FIELD.search(raw)
+            if datetime is not None:
+                value = _VALUE_FIELD.search(raw)
+                datetime = datetime.group(1)
+                buffer.append(
+                    json.loads(b'"' + datetime + b'"') if b"\\" in datetime else datetime,
+                    float(value.group(1)) if value is not None else np.nan,
+                )
+        else:
+            _parse_value_object(tokens, next(tokens), buffer)
+        kind, _ = next(tokens)
+        if kind == "]":
+            return
+        if kind != ",":
+            raise ValueError("Expected ',' or ']' in array")
+
+
+def _parse_value_object(tokens: TokenStream, first: Tuple[str, object], buffer: FeatureBuffer):
+    if first[0] != "{":
+        raise ValueError("Expected a value object")
+    datetime = None
+    value = np.nan
+    for key, member in iter_object(tokens):
+        if key == "datetime" and member[0] == STRING:
+            datetime = member[1]
+        elif key == "value" and member[0] == NUMBER:
+            value = float(member[1])
+        else:
+            skip_value(member, tokens)
+    if datetime is not None:
+        buffer.append(datetime, value)
+
+
+def _parse_features(tokens: Iterator, capacity: int) -> Tuple[List[str], List[np.ndarray], List[np.ndarray]]:
+    names = []
+    datetimes = []
+    values = []
+    for kind, _ in iter_array(tokens):
+        if kind != "{":
+            raise ValueError("Expected a feature object")
+        name = None
+        buffer = FeatureBuffer(capacity)
+        for key, first in iter_object(tokens):
+            if key == "name" and first[0] == STRING:
+                name = first[1]
+            elif key == "values" and first[0] == "[":
+                _parse_values(tokens, buffer)
+            else:
+                skip_value(first, tokens)
+        if buffer.size:
+            feature_datetimes, feature_values = buffer.arrays()
+            names.append(name)
+            datetimes.append(feature_datetimes)
+            values.append(feature_values)
+    return names, datetimes, values
+
+
+def parse_bulk_policies(chunks: Iterable[bytes], capacities: Optional[List[int]] = None) -> List[tuple]:
+    """
+    Streams a /bulk/policies response into per-feature NumPy arrays.
+
+    Only data[].features[].name and data[].features[].values[].{datetime, value} are kept. Each entry of
+    "values" is matched as one flat object and only those two fields are pulled out of it, so id,
+    feature_id, time_recorded, published_at and updated_at are never turned into Python objects.
+
+    Args:
+        chunks (Iterable[bytes]): The raw response body in chunks.
+        capacities (List[int], optional): Expected values per feature for each entry of "data", used to
+                                          preallocate the buffers.
+
+    Returns:
+        list of tuple: One (names, datetimes, values) triple per entry of "data".
+    """
+    tokens = TokenStream(chunks)
+    _expect(tokens, "{")
+    results = []
+    for key, first in iter_object(tokens):
+        if key != "data" or first[0] != "[":
+            skip_value(first, tokens)
+            continue
+        for kind, _ in iter_array(tokens):
+            if kind != "{":
+                raise ValueError("Expected a feature response object")
+            capacity = capacities[len(results)] if capacities and len(results) < len(capacities) else 1024
+            parsed = ([], [], [])
+            for fv_key, fv_first in iter_object(tokens):
+                if fv_key == "features" and fv_first[0] == "[":
+                    parsed = _parse_features(tokens, capacity)
+                else:
+                    skip_value(fv_first, tokens)
+            results.append(parsed)
+    return results
@@ -0,0 +1,137 @@
+"""
+A local stand-in for the Quantum Zero /bulk/policies endpoint.
+
+It answers with the same response shape as the real server and deterministic values, so requests can be
+tested offline and split or cached requests can be compared with a single one. Point a client at it with
+QZeroClient(base_url=url) or the QZERO_BASE_URL environment variable.
+
+Run standalone from the repository root:
+    python -m backend.stub_server --port 8060 --latency 0.2
+"""
+import argparse
+import gzip
+import json
+import threading
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Tuple
+
+import pandas as pd
+
+from backend.endpoint_helper import format_hours
+
+
+def stub_value(feature: str, datetime: str) -> float:
+    """
+    Deterministic value of a feature at a datetime, independent of how the request was split.
+    """
+    return zlib.crc32(f"{feature}|{datetime}".encode()) % 100_000 / 100
+
+
+def build_response(payload: dict) -> dict:
+    """
+    Builds the /bulk/policies response for a MetaPayload dictionary.
+    """
+    fv_requests = json.loads(payload["json"])
+    data = []
+    for fv_request in fv_requests:
+        index = fv_request.get("index")
+        if index is None:
+            # Compact payloads describe the hours as a range instead of listing them
+            hours = fv_request["range"]
+            index = format_hours(pd.Timestamp(hours["start"]), pd.Timestamp(hours["end"]), hours["tz"])
+        features = []
+        for feature_idx, feature in enumerate(fv_request["features"]):
+            features.append(
+                {
+                    "name": feature,
+                    "values": [
+                        {
+                            "id": idx,
+                            "feature_id": f"stub-{feature_idx}",
+                            "datetime": datetime,
+                            "value": stub_value(feature, datetime),
+                            "time_recorded": datetime,
+                            "published_at": datetime,
+                            "updated_at": datetime,
+                        }
+                        for idx, datetime in enumerate(index)
+                    ],
+                }
+            )
+        data.append({"features": features})
+    return {"data": data}
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    # HTTP/1.1 keeps connections alive between requests, like the real host
+    protocol_version = "HTTP/1.1"
+    # Seconds every request takes, and extra seconds per returned value, to mimic the real server
+    latency = 0.0
+    seconds_per_value = 0.0
+    requests_served = 0
+    connections = set()
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        payload = json.loads(self.rfile.read(length))
+        response = build_response(payload)
+        n_values = sum(
+            len(feature["values"]) for fvresponse in response["data"] for feature in fvresponse["features"]
+        )
+        time.sleep(self.latency + n_values * self.seconds_per_value)
+
+        body = json.dumps(response).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        if "gzip" in self.headers.get("Accept-Encoding", ""):
+            body = gzip.compress(body, compresslevel=1)
+            self.send_header("Content-Encoding", "gzip")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+        type(self).requests_served += 1
+        type(self).connections.add(self.client_address)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_stub_server(
+    port: int = 0, latency: float = 0.0, seconds_per_value: float = 0.0
+) -> Tuple[ThreadingHTTPServer, str]:
+    """
+    Starts the stub server on a daemon thread.
+
+    Args:
+        port (int): Port to listen on; 0 picks a free one.
+        latency (float): Seconds added to every request.
+        seconds_per_value (float): Seconds added per returned value.
+
+    Returns:
+        tuple: The running server (call shutdown() to stop it) and its base URL.
+    """
+    handler = type("ConfiguredStubHandler", (StubHandler,), {
+        "latency": latency,
+        "seconds_per_value": seconds_per_value,
+        "requests_served": 0,
+        "connections": set(),
+    })
+    server = ThreadingHTTPServer(("127.0.0.1", port), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--port", type=int, default=8060)
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--seconds-per-value", type=float, default=0.0)
+    args = parser.parse_args()
+    server, url = start_stub_server(args.port, args.latency, args.seconds_per_value)
+    print(f"Stub Quantum Zero server listening on {url}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
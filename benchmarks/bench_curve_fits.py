@@ -0,0 +1,89 @@
+"""
+Compares the sufficient-statistics curve fits of create_scatter_plot_fig against the previous four separate fits.
+
+Run from the repository root:
+    python -m benchmarks.bench_curve_fits
+"""
+import time
+
+import numpy as np
+from scipy.stats import linregress
+
+from backend.curve_fits import FIT_MODELS, cached_fit_curves, fit_cache_key, fit_curves, values_digest
+
+
+ROW_COUNTS = [24, 10_000, 1_000_000]
+CACHED_GRAPHS = 36
+
+
+def make_pairs(n_rows: int) -> tuple:
+    """
+    Builds positive, price-like x and y values that roughly follow a power law.
+    """
+    rng = np.random.default_rng(0)
+    x = rng.uniform(5, 500, n_rows)
+    y = 3 * x ** 0.8 * rng.lognormal(0, 0.2, n_rows)
+    return x, y
+
+
+def fits_separately(x, y) -> dict:
+    """
+    The previous create_linear/log/poly/power_best_fit, kept here as the baseline (without their prints).
+    """
+    slope, intercept, r_value, _, _ = linregress(x, y)
+    fits = {"linear": ((slope, intercept), r_value ** 2)}
+
+    slope, intercept, r_value, _, _ = linregress(np.log(x), y)
+    fits["log"] = ((slope, intercept), r_value ** 2)
+
+    coefficients = np.polyfit(x, y, 2)
+    y_fit = np.poly1d(coefficients)(x)
+    fits["poly"] = (tuple(coefficients), 1 - np.sum((y - y_fit) ** 2) / np.sum((y - np.mean(y)) ** 2))
+
+    slope, intercept, _, _, _ = linregress(np.log(x), np.log(y))
+    a, b = np.exp(intercept), slope
+    y_fit = a * np.power(x, b)
+    fits["power"] = ((a, b), 1 - np.sum((y - y_fit) ** 2) / np.sum((y - np.mean(y)) ** 2))
+    return fits
+
+
+def best_of(function, repeat: int = 3) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main():
+    print(f"{'rows':>9} {'separate (s)':>13} {'one pass (s)':>13} {'speedup':>8} {f'{CACHED_GRAPHS} cached (s)':>15}")
+    for n_rows in ROW_COUNTS:
+        x, y = make_pairs(n_rows)
+        expected = fits_separately(x, y)
+        actual = fit_curves(x, y)
+        for model in FIT_MODELS:
+            np.testing.assert_allclose(actual[model].coefficients, expected[model][0], rtol=1e-7, atol=1e-9)
+            np.testing.assert_allclose(actual[model].r_squared, expected[model][1], rtol=1e-7)
+
+        separate_time = best_of(lambda: fits_separately(x, y))
+        one_pass_time = best_of(lambda: fit_curves(x, y))
+        # A page of scatter graphs whose data did not change (Ops keeps the column digests) under a new filter mask
+        digests = [values_digest(x), values_digest(y)]
+        mask = np.ones(n_rows, dtype=bool)
+
+        def fit_page():
+            return [
+                cached_fit_curves(fit_cache_key([f"x{graph}", "y", *digests], mask), x, y) for graph in range(CACHED_GRAPHS)
+            ]
+
+        fit_page()
+        cached_time = best_of(fit_page)
+        print(
+            f"{n_rows:>9} {separate_time:>13.4f} {one_pass_time:>13.4f} "
+            f"{separate_time / one_pass_time:>7.1f}x {cached_time:>15.5f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
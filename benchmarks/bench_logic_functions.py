@@ -0,0 +1,119 @@
+"""
+Compares the vectorized assign_color and calculate_user_predictions against the previous iterrows loops.
+
+Run from the repository root:
+    python -m benchmarks.bench_logic_functions
+"""
+import time
+
+import numpy as np
+import pandas as pd
+
+from backend.data_setup import calculate_user_predictions
+from utils.logic_functions import assign_color
+
+
+ROW_COUNTS = [24, 10_000, 1_000_000]
+SLIDER_VALUE = 30
+
+
+def make_frame(n_rows: int) -> pd.DataFrame:
+    """
+    Builds an hourly frame with two prediction columns, including equal and missing values.
+    """
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame(
+        {
+            "shock": rng.normal(30, 10, n_rows).round(0),
+            "regular": rng.normal(30, 10, n_rows).round(0),
+        },
+        index=pd.date_range("2023-01-01", periods=n_rows, freq="h"),
+    )
+    df.iloc[::7, 1] = df.iloc[::7, 0]
+    df.iloc[::11, 0] = np.nan
+    return df
+
+
+def assign_color_iterrows(df, col1, col2, base_zero=False) -> list:
+    """
+    The previous implementation of assign_color, kept here as the baseline.
+    """
+    colors = []
+    for i, row in df.iterrows():
+        if row[col1] > (0 if base_zero else row[col2]):
+            colors.append('rgba(0, 255, 0, 0.7)')
+        elif (0 if base_zero else row[col2]) > row[col1]:
+            colors.append('rgba(255, 0, 0, 0.7)')
+        else:
+            colors.append('rgba(0, 0, 0, 0)')
+    return colors
+
+
+def calculate_user_predictions_iterrows(df, lower_prediction_column_str, upper_prediction_column_str, slider_percentage) -> list:
+    """
+    The previous implementation of calculate_user_predictions, kept here as the baseline.
+    """
+    percentage = slider_percentage / 100.0
+    user_predictions = []
+    for index, row in df.iterrows():
+        regular_model = row[lower_prediction_column_str]
+        shock_model = row[upper_prediction_column_str]
+        abs_difference = abs(shock_model - regular_model)
+        if shock_model > regular_model:
+            prediction = regular_model + (abs_difference * percentage)
+        else:
+            prediction = shock_model + (abs_difference * percentage)
+        user_predictions.append(prediction)
+    return user_predictions
+
+
+def best_of(function, repeat: int = 3) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main():
+    print(f"{'function':>26} {'rows':>9} {'iterrows (s)':>13} {'vectorized (s)':>15} {'speedup':>8}")
+    for n_rows in ROW_COUNTS:
+        df = make_frame(n_rows)
+        # The loops take about a minute at 1M rows, so they are only timed once there
+        baseline_repeat = 3 if n_rows <= 10_000 else 1
+        cases = [
+            (
+                "assign_color",
+                lambda: assign_color_iterrows(df, "shock", "regular"),
+                lambda: assign_color(df, "shock", "regular"),
+            ),
+            (
+                "assign_color (base zero)",
+                lambda: assign_color_iterrows(df, "shock", None, base_zero=True),
+                lambda: assign_color(df, "shock", None, base_zero=True),
+            ),
+            (
+                "calculate_user_predictions",
+                lambda: calculate_user_predictions_iterrows(df, "regular", "shock", SLIDER_VALUE),
+                lambda: calculate_user_predictions(df, "regular", "shock", SLIDER_VALUE),
+            ),
+        ]
+        for name, baseline, vectorized in cases:
+            expected = np.asarray(baseline(), dtype=object if name.startswith("assign_color") else float)
+            actual = vectorized()
+            if name.startswith("assign_color"):
+                assert np.array_equal(actual, expected), name
+            else:
+                np.testing.assert_array_equal(actual, expected)
+
+            baseline_time = best_of(baseline, baseline_repeat)
+            vectorized_time = best_of(vectorized)
+            print(
+                f"{name:>26} {n_rows:>9} {baseline_time:>13.4f} {vectorized_time:>15.4f} "
+                f"{baseline_time / vectorized_time:>7.0f}x"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+"""
+Compares the vectorized QZeroClient.parse_response against the previous per-feature pd.concat parser.
+
+Run from the repository root:
+    python -m benchmarks.bench_parse_response
+"""
+import time
+import uuid
+
+import numpy as np
+import pandas as pd
+
+from backend.endpoint_helper import QZeroClient
+
+
+FEATURE_COUNTS = [10, 50, 100]
+MONTHS = [1, 6, 24]
+
+
+class FakeResponse:
+    """
+    Stands in for requests.Response so the parsers can be timed without a network round-trip.
+    """
+
+    def __init__(self, payload: dict):
+        self.payload = payload
+
+    def json(self) -> dict:
+        return self.payload
+
+
+def make_payload(n_features: int, n_months: int) -> dict:
+    """
+    Builds a /bulk/policies style payload with one hourly value per feature per hour.
+    """
+    datetimes = pd.date_range("2023-01-01", periods=n_months * 30 * 24, freq="h", tz="EST")
+    datetimes_as_string = datetimes.strftime("%Y-%m-%dT%H:%M:%S%z").tolist()
+    rng = np.random.default_rng(0)
+    features = []
+    for feature_idx in range(n_features):
+        feature_id = str(uuid.uuid4())
+        values = rng.normal(30, 10, len(datetimes)).round(2).tolist()
+        features.append(
+            {
+                "name": f"feature_{feature_idx}",
+                "values": [
+                    {
+                        "id": idx,
+                        "feature_id": feature_id,
+                        "datetime": datetime,
+                        "value": value,
+                        "time_recorded": datetime,
+                        "published_at": datetime,
+                        "updated_at": datetime,
+                    }
+                    for idx, (datetime, value) in enumerate(zip(datetimes_as_string, values))
+                ],
+            }
+        )
+    return {"data": [{"features": features}]}
+
+
+def parse_response_concat(response) -> list:
+    """
+    The previous implementation of QZeroClient.parse_response, kept here as the baseline.
+    """
+    fvresponses = response.json()["data"]
+    dataframes = []
+    for fvresponse in fvresponses:
+        features = fvresponse["features"]
+        df = pd.DataFrame()
+        for feature in features:
+            feature_name = feature["name"]
+            feature_values = feature["values"]
+            df_feature = pd.DataFrame(feature_values)
+            if "datetime" not in df_feature.columns:
+                continue
+            df_feature["datetime"] = pd.to_datetime(df_feature["datetime"])
+            df_feature = df_feature.set_index("datetime")
+            df_feature = df_feature.drop(
+                columns=["id", "feature_id", "time_recorded", "published_at", "updated_at"]
+            )
+            df_feature = df_feature.rename(columns={"value": feature_name})
+            df = pd.concat([df, df_feature], axis=1)
+        dataframes.append(df)
+    return dataframes
+
+
+def best_of(function, response, repeat: int = 3) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function(response)
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main():
+    client = QZeroClient()
+    print(f"{'features':>8} {'months':>6} {'concat (s)':>11} {'vectorized (s)':>15} {'speedup':>8}")
+    for n_features in FEATURE_COUNTS:
+        for n_months in MONTHS:
+            response = FakeResponse(make_payload(n_features, n_months))
+            expected = parse_response_concat(response)[0]
+            actual = client.parse_response(response)[0]
+            pd.testing.assert_frame_equal(actual, expected, check_freq=False)
+
+            concat_time = best_of(parse_response_concat, response)
+            vectorized_time = best_of(client.parse_response, response)
+            print(
+                f"{n_features:>8} {n_months:>6} {concat_time:>11.3f} {vectorized_time:>15.3f} "
+                f"{concat_time / vectorized_time:>7.1f}x"
+            )
+
+
+if __name__ == "__main__":
+    main()
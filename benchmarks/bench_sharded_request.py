@@ -0,0 +1,52 @@
+"""
+Compares one unsharded request against the sharded, concurrent fetch, using the local stub server.
+
+Run from the repository root:
+    python -m benchmarks.bench_sharded_request
+"""
+import os
+import time
+
+import pandas as pd
+
+from backend.endpoint_helper import simple_request
+from backend.stub_server import start_stub_server
+
+
+FEATURES = [f"feature_{idx}" for idx in range(40)]
+START_DATE = "2024-01-01"
+END_DATE = "2024-12-31"
+
+# Roughly what the real server costs: a fixed overhead plus time proportional to the values returned
+LATENCY = 0.2
+SECONDS_PER_VALUE = 2e-5
+
+
+def timed(function, *args, **kwargs):
+    start = time.perf_counter()
+    result = function(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+
+def main():
+    server, url = start_stub_server(latency=LATENCY, seconds_per_value=SECONDS_PER_VALUE)
+    os.environ["QZERO_BASE_URL"] = url
+    try:
+        single, single_time = timed(
+            simple_request, START_DATE, END_DATE, FEATURES, use_cache=False,
+            shard_days=366, shard_features=len(FEATURES),
+        )
+        sharded, sharded_time = timed(
+            simple_request, START_DATE, END_DATE, FEATURES, use_cache=False,
+        )
+        pd.testing.assert_frame_equal(sharded[0], single[0], check_freq=False)
+    finally:
+        server.shutdown()
+
+    print(f"{len(FEATURES)} features, {START_DATE} to {END_DATE}, {single[0].size} values")
+    print(f"single request:  {single_time:.2f}s")
+    print(f"sharded request: {sharded_time:.2f}s ({single_time / sharded_time:.1f}x), frames identical")
+
+
+if __name__ == "__main__":
+    main()
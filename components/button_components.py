@@ -54,7 +54,14 @@ def table_slider(id, download_id, display=False):
                     html.Div(
                         children=[
                             html.H3("Adjust predictions offset ", className="mb-2"),
-                            button(text="↓", id=download_id, style=button_style),       
+                            html.Div(
+                                children=[
+                                    # Progress of a running export, shown next to the button while it runs
+                                    html.Span(id=f"{download_id}_progress", className="mr-2 text-sm", style={"display": "none"}),
+                                    button(text="↓", id=download_id, style=button_style),
+                                ],
+                                className="flex flex-row items-center"
+                            ),
                         ],
                         className="flex flex-row justify-between"
                     ),
@@ -1,8 +1,72 @@
+import numpy as np
+import pandas as pd
 import plotly.graph_objects as go
-from utils.logic_functions import assign_color
+from utils.logic_functions import GREEN, RED, assign_color
 from backend.data_setup import calculate_user_predictions
+from utils.downsampling import DEFAULT_GRAPH_WIDTH, downsample_frame, window_frame
 
-def main_graph(df, col1, col2, col3, show_user_prediction=False, slider_value=0, prevent_calculating_prediction=False):
+# Band colours, in the order of their traces; hours where neither series is above the other are not shaded
+BAND_COLORS = (GREEN, RED)
+
+# Position of the "User Prediction" trace in main_graph (col1, col2, the two bands, col3, User Prediction),
+# so slider changes can patch its values without resending the figure
+USER_PREDICTION_TRACE = 5
+
+def plot_index(index):
+    """
+    This function returns the x values to draw an index with.
+    
+    Plotly.js ignores UTC offsets and shows the wall time, so timezone aware indexes are drawn as their naive
+    wall time. Naive datetime64 values serialize far faster than the Timestamp objects of an aware index, and
+    the zoom ranges the graph reports are in the same wall time.
+    """
+    if getattr(index, "tz", None) is not None:
+        return index.tz_localize(None)
+    return index
+
+def band_traces(index, lower, upper, colors):
+    """
+    This function builds the shading between two series as one polygon trace per colour.
+    
+    Each hour i with a colour becomes the rectangle (x[i], x[i+1]) x (lower[i], upper[i]), drawn in the
+    same step shape as the 'hv' lines. All rectangles of a colour are concatenated into a single trace,
+    separated by None points, so the figure has the same traces whatever the number of rows.
+    
+    Parameters:
+    index (pandas.Index): The x values (the DataFrame index).
+    lower (array-like): The series the shading starts from.
+    upper (array-like): The series the shading goes to.
+    colors (list): The fill colour of each row, as returned by assign_color.
+    
+    Returns:
+    list: One go.Scatter trace per colour of BAND_COLORS (empty when no hour has that colour).
+    """
+    lower = np.asarray(lower, dtype=float)
+    upper = np.asarray(upper, dtype=float)
+    colors = np.asarray(colors, dtype=object)
+    
+    # The last row has no following hour to extend to, and rows with a missing value have no area
+    drawable = np.zeros(len(colors), dtype=bool)
+    drawable[:-1] = np.isfinite(lower[:-1]) & np.isfinite(upper[:-1])
+    
+    fill_value = pd.NaT if isinstance(index, pd.DatetimeIndex) else np.nan
+    traces = []
+    for color in BAND_COLORS:
+        rows = np.flatnonzero(drawable & (colors == color))
+        # Five points per rectangle: four corners and a gap (-1 takes the fill value, None in the figure)
+        positions = np.column_stack([rows, rows, rows + 1, rows + 1, np.full(len(rows), -1)]).ravel()
+        y = np.column_stack([lower[rows], upper[rows], upper[rows], lower[rows], np.full(len(rows), np.nan)]).ravel()
+        traces.append(go.Scatter(
+            x=index.take(positions, allow_fill=True, fill_value=fill_value),
+            y=y,
+            fill='toself', fillcolor=color,  # Fill the area with the color determined earlier
+            mode='lines', line=dict(color='rgba(255,255,255,0)'),  # Set the line to be transparent
+            showlegend=False, hoverinfo='none'  # Hide the legend and hover information
+        ))
+    return traces
+
+def main_graph(df, col1, col2, col3, show_user_prediction=False, slider_value=0, prevent_calculating_prediction=False,
+               x_range=None, width=DEFAULT_GRAPH_WIDTH):
     """
     This function creates a Plotly graph comparing three different time series data 
     from the DataFrame, with color filling between two series based on their relative values.
@@ -12,6 +76,8 @@ def main_graph(df, col1, col2, col3, show_user_prediction=False, slider_value=0,
     col1 (str): The name of the first column to be plotted.
     col2 (str): The name of the second column to be plotted.
     col3 (str): The name of the third column to be plotted.
+    x_range (list, optional): The [start, end] window the user zoomed to; only those rows are drawn.
+    width (int, optional): The graph width in pixels, used to downsample long ranges.
     
     Returns:
     plotly.graph_objects.Figure: The Plotly figure object containing the graph.
@@ -20,34 +86,34 @@ def main_graph(df, col1, col2, col3, show_user_prediction=False, slider_value=0,
         if not prevent_calculating_prediction:
             df["User Prediction"] = calculate_user_predictions(df, col2, col1,slider_value)
     
+    full_range = [plot_index(df.index).min(), plot_index(df.index).max()]
+    if x_range is not None:
+        df = window_frame(df, x_range)
+    
+    # Use the assign_color function to determine the color for each time period, then keep about two rows
+    # per pixel (the first and last change of color in each pixel are kept)
+    colors = assign_color(df=df, col1=col1, col2=col2)
+    line_columns = [col1, col2, col3] + (['User Prediction'] if show_user_prediction else [])
+    df, colors = downsample_frame(df, line_columns, colors, width)
+    x = plot_index(df.index)
+    
     # Initialize a new figure for the graph
     fig = go.Figure()
     
     # Add the first time series to the figure (NYISpjm shock x forecast)
-    fig.add_trace(go.Scatter(x=df.index, y=df[col1], mode='lines', name=col1, line_shape='hv'))
+    fig.add_trace(go.Scatter(x=x, y=df[col1], mode='lines', name=col1, line_shape='hv'))
     
     # Add the second time series to the figure (NYIS pjm DA regular prediction)
-    fig.add_trace(go.Scatter(x=df.index, y=df[col2], mode='lines', name=col2, line_shape='hv'))
-
-    colors = assign_color(df=df, col1=col1, col2=col2)
+    fig.add_trace(go.Scatter(x=x, y=df[col2], mode='lines', name=col2, line_shape='hv'))
     
     # Create shaded areas between the two time series (col2 and col1) based on their relative values
-    for i in range(len(df)-1):
-        fig.add_trace(go.Scatter(
-            x=[df.index[i], df.index[i], df.index[i+1], df.index[i+1]],  # X coordinates for the shaded area
-            y=[df[col2].iloc[i], df[col1].iloc[i], 
-               df[col1].iloc[i], df[col2].iloc[i]],  # Y coordinates for the shaded area
-            fill='toself', fillcolor=colors[i],  # Fill the area with the color determined earlier
-            line=dict(color='rgba(255,255,255,0)'),  # Set the line to be transparent
-            showlegend=False, hoverinfo='none'  # Hide the legend and hover information
-        ))
+    fig.add_traces(band_traces(x, df[col2], df[col1], colors))
     
     # Add the third time series to the figure (Actuals)
-    fig.add_trace(go.Scatter(x=df.index, y=df[col3], mode='lines', name=col3, line_shape='hv'))
+    fig.add_trace(go.Scatter(x=x, y=df[col3], mode='lines', name=col3, line_shape='hv'))
     
     if show_user_prediction:
-        fig.add_trace(go.Scatter(x=df.index, y=df['User Prediction'], mode='lines', name="User Prediction", line_shape='hv', line=dict(color='black')))
-    # Use the assign_color function to determine the color for each time period
+        fig.add_trace(go.Scatter(x=x, y=df['User Prediction'], mode='lines', name="User Prediction", line_shape='hv', line=dict(color='black')))
     
     # Update the layout with axis labels, range, and legend settings
     fig.update_layout(
@@ -55,14 +121,14 @@ def main_graph(df, col1, col2, col3, show_user_prediction=False, slider_value=0,
         xaxis_title='Datetime',  # Label for the X axis
         yaxis_title='Price',  # Label for the Y axis
         legend=dict(orientation='h', yanchor='bottom', y=1.02, xanchor='right', x=1),  # Legend placement
-        xaxis_range=[df.index.min(), df.index.max()],  # Set the X axis range to match the data
+        xaxis_range=x_range or full_range,  # Set the X axis range to match the data (or the zoomed window)
         margin=dict(t=0),  # Remove top margin
     )
     
     # Return the figure object
     return fig
 
-def spread_graph(df, col1):
+def spread_graph(df, col1, x_range=None, width=DEFAULT_GRAPH_WIDTH):
     """
     This function creates a Plotly graph for a single time series data 
     showing the predicted spread between PJM and NYIS Shock models.
@@ -70,31 +136,31 @@ def spread_graph(df, col1):
     Parameters:
     df (pandas.DataFrame): The DataFrame containing the time series data.
     col1 (str): The name of the column to be plotted.
+    x_range (list, optional): The [start, end] window the user zoomed to; only those rows are drawn.
+    width (int, optional): The graph width in pixels, used to downsample long ranges.
     
     Returns:
     plotly.graph_objects.Figure: The Plotly figure object containing the graph.
     """
+    full_range = [plot_index(df.index).min(), plot_index(df.index).max()]
+    if x_range is not None:
+        df = window_frame(df, x_range)
+
+    # Use the assign_color function to determine the color for the time periods, then keep about two rows
+    # per pixel (the first and last change of sign in each pixel are kept)
+    colors = assign_color(df=df, col1=col1, col2=None, base_zero=True)
+    df, colors = downsample_frame(df, [col1], colors, width)
+    x = plot_index(df.index)
     
     # Initialize a new figure for the spread graph
     fig = go.Figure()
     
     # Add the time series to the figure (PJM to NYIS Shock models predicted spread)
-    fig.add_trace(go.Scatter(x=df.index, y=df[col1], mode='lines', 
+    fig.add_trace(go.Scatter(x=x, y=df[col1], mode='lines', 
                               name=col1, line_shape='hv'))
 
-    # Use the assign_color function to determine the color for the time periods
-    colors = assign_color(df=df, col1=col1, col2=None, base_zero=True)
-
     # Create shaded areas beneath the time series to represent the spread
-    for i in range(len(df) - 1):
-        fig.add_trace(go.Scatter(
-            x=[df.index[i], df.index[i], df.index[i+1], df.index[i+1]],  # X coordinates for the shaded area
-            y=[0, df[col1].iloc[i], 
-               df[col1].iloc[i], 0],  # Y coordinates for the shaded area
-            fill='toself', fillcolor=colors[i],  # Fill the area with the color determined earlier
-            line=dict(color='rgba(255,255,255,0)'),  # Set the line to be transparent
-            showlegend=False, hoverinfo='none'  # Hide the legend and hover information
-        ))
+    fig.add_traces(band_traces(x, np.zeros(len(df)), df[col1], colors))
 
     # Update the layout with axis labels, range, and legend settings
     fig.update_layout(
@@ -102,7 +168,7 @@ def spread_graph(df, col1):
         xaxis_title='Datetime',  # Label for the X axis
         yaxis_title='Spread',  # Label for the Y axis
         legend=dict(orientation='h', yanchor='bottom', y=1.02, xanchor='right', x=1),  # Legend placement
-        xaxis_range=[df.index.min(), df.index.max()],  # Set the X axis range to match the data
+        xaxis_range=x_range or full_range,  # Set the X axis range to match the data (or the zoomed window)
         margin=dict(t=0),  # Remove top margin
     )
     
@@ -1,8 +1,5 @@
-import dash_mantine_components as dmc
-import numpy as np
 import pandas as pd
 from backend.data_setup import calculate_user_predictions
-import utils.export_variables as variables
 # Dash imports
 from dash import html
 import dash_ag_grid as dag
@@ -11,6 +8,31 @@ import warnings
 warnings.filterwarnings("ignore")
 #import app
 
+def last_day_predictions(df, cols, slider_value=0):
+    """
+    This function returns the most recent day of a DataFrame with its "User Prediction" column.
+    
+    Parameters:
+    df (pandas.DataFrame): The DataFrame containing the data.
+    cols (list): The shock and regular prediction columns, in that order.
+    slider_value (int, optional): The prediction offset in percent. Defaults to 0.
+    
+    Returns:
+    pandas.DataFrame: The rows of the latest date with `cols` and "User Prediction".
+    """
+    last_day = df.index.max().date()  # Get the latest date from the DataFrame index
+    df = df[df.index.date == last_day]# Filter rows for the latest day
+    df["User Prediction"] = calculate_user_predictions(df, cols[1], cols[0],slider_value)
+    return df[cols + ["User Prediction"]]
+
+def user_prediction_row(predictions_df):
+    """
+    This function returns the "User Prediction" row of main_table (as it appears in the table's rowData)
+    for a frame built by last_day_predictions.
+    """
+    values = predictions_df["User Prediction"].to_numpy(dtype=float).round(2)
+    return {"Hour": "User Prediction", **{hour: value for hour, value in enumerate(values.tolist())}}
+
 def main_table(df, cols, id, display=False, slider_value=0 ):
     """
     This function generates a table using Dash components to display a DataFrame.
@@ -32,17 +54,11 @@ def main_table(df, cols, id, display=False, slider_value=0 ):
 
     # Filter the DataFrame to show data for the most recent day
     if not df.empty:  
-        last_day = df.index.max().date()  # Get the latest date from the DataFrame index
-        df = df[df.index.date == last_day]# Filter rows for the latest day
-        df["User Prediction"] = calculate_user_predictions(df, cols[1], cols[0],slider_value)
+        df = last_day_predictions(df, cols, slider_value)
         for index, col in enumerate(cols+["User Prediction"]):
             data.loc[index, "Hour"] = col
             data.iloc[index, 1:] = df[col]
         data = data.round(2)
-        if id == "main_table":
-            variables.export_df1 = df[cols+["User Prediction"]]
-        else:
-            variables.export_df2 = df[cols+["User Prediction"]]
         
   
     return html.Div(
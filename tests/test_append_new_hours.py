@@ -0,0 +1,90 @@
+"""
+Checks that Ops.append_new_hours picks up values revised on the server after they were loaded, and that
+the result matches a dataframe built from scratch.
+
+Run from the repository root:
+    python -m pytest tests
+"""
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import pandas as pd
+
+from backend import endpoint_helper, stub_server
+from backend.Class import Ops
+
+
+FEATURES = ["PJM nyis DA", "NYIS pjm DA"]
+REVISION = 1000
+original_value = stub_server.stub_value
+
+
+def revised_value(feature: str, datetime: str) -> float:
+    return original_value(feature, datetime) + REVISION
+
+
+class AppendNewHoursTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.cache_dir = tempfile.TemporaryDirectory()
+        cls.server, url = stub_server.start_stub_server()
+        cls.environ = mock.patch.dict(
+            os.environ, {"QZERO_BASE_URL": url, "QZERO_CACHE_PATH": os.path.join(cls.cache_dir.name, "cache.sqlite")}
+        )
+        cls.environ.start()
+        endpoint_helper._client = None
+        endpoint_helper._feature_cache = None
+
+    @classmethod
+    def tearDownClass(cls):
+        endpoint_helper._client = None
+        endpoint_helper._feature_cache = None
+        cls.environ.stop()
+        cls.server.shutdown()
+        cls.cache_dir.cleanup()
+
+    def build(self, end_date: str) -> Ops:
+        ops = Ops()
+        ops.update_data_features(FEATURES)
+        ops.update_date_range("2024-12-15", end_date)
+        ops.update_df()
+        ops.create_feature([{"Feature": "PJM nyis DA"}, {"Feature": "NYIS pjm DA", "Operation": "-"}], False, "spread")
+        return ops
+
+    def test_features_missing_from_the_fetch(self):
+        ops = self.build("2024-12-20")
+        before = ops.frame()
+        fetched_df = self.build("2024-12-22").df.drop(columns=FEATURES[1])
+
+        # Hours are still added for the features fetched; the others keep their loaded values
+        self.assertGreater(ops.append_new_hours("2024-12-22", fetched_df), 0)
+        after = ops.frame()
+        added = after.index[len(before.index) :]
+        self.assertEqual(added[-1], fetched_df.index[-1])
+        pd.testing.assert_series_equal(after.loc[added, FEATURES[0]], fetched_df.loc[added, FEATURES[0]])
+        self.assertTrue(after.loc[added, FEATURES[1]].isna().all())
+        pd.testing.assert_series_equal(after.loc[before.index, FEATURES[1]], before[FEATURES[1]])
+
+    def test_revised_hours_are_merged(self):
+        ops = self.build("2024-12-20")
+        before = ops.frame()
+        last_day = before.index[-1].normalize()
+
+        with mock.patch.object(stub_server, "stub_value", revised_value):
+            self.assertGreater(ops.append_new_hours("2024-12-22"), 0)
+            expected = self.build("2024-12-22")
+
+        # The last loaded day is fetched again, so its revised values replace the loaded and cached ones
+        kept = before.index < last_day
+        reloaded = before.index[~kept]
+        after = ops.frame()
+        pd.testing.assert_frame_equal(after.loc[before.index[kept]], before[kept])
+        pd.testing.assert_series_equal(after.loc[reloaded, FEATURES[0]], before.loc[reloaded, FEATURES[0]] + REVISION)
+        pd.testing.assert_series_equal(after.loc[reloaded, "spread"], before.loc[reloaded, "spread"])
+        pd.testing.assert_frame_equal(after, expected.frame())
+
+
+if __name__ == "__main__":
+    unittest.main()
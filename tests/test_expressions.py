@@ -0,0 +1,53 @@
+"""
+Checks that compiled created-feature equations give the same bits as summing their terms left to right, as
+the equations were evaluated before they were compiled, while equal and negated sub-expressions are shared.
+
+Run from the repository root:
+    python -m pytest tests
+"""
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from backend.expressions import ExpressionEvaluator, compile_equation
+
+
+def equation(*terms: str) -> list:
+    # equation("a", "-b", "+c") is a - b + c
+    return [{"Feature": terms[0]}] + [{"Feature": term[1:], "Operation": term[0]} for term in terms[1:]]
+
+
+def left_to_right(df: pd.DataFrame, terms: list) -> np.ndarray:
+    values = df[terms[0]["Feature"]]
+    for term in terms[1:]:
+        values = values + df[term["Feature"]] if term["Operation"] == "+" else values - df[term["Feature"]]
+    return values.to_numpy()
+
+
+class ExpressionEvaluatorTest(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        self.df = pd.DataFrame(rng.normal(size=(1000, 4)) * 1000 + 0.1, columns=list("abcd"))
+
+    def test_sums_left_to_right(self):
+        for terms in [equation("a", "-b", "+c", "-d"), equation("c", "+a", "-b"), equation("d", "+c", "+b", "+a")]:
+            with self.subTest(terms=terms):
+                values = ExpressionEvaluator(self.df).evaluate(compile_equation(terms))
+                np.testing.assert_array_equal(values, left_to_right(self.df, terms))
+
+    def test_negations_are_shared(self):
+        evaluator = ExpressionEvaluator(self.df)
+        spread = evaluator.evaluate(compile_equation(equation("a", "-b", "+c")))
+        cached = len(evaluator.cache)
+        reverse = evaluator.evaluate(compile_equation(equation("b", "-a", "-c")))
+        self.assertEqual(len(evaluator.cache), cached + 1)
+        np.testing.assert_array_equal(reverse, -spread)
+
+    def test_unknown_operation(self):
+        with self.assertRaises(ValueError):
+            compile_equation([{"Feature": "a"}, {"Feature": "b", "Operation": "%"}])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,65 @@
+"""
+Checks that the streaming /bulk/policies parser returns the same frames as QZeroClient.parse_response,
+however the body is cut into chunks.
+
+Run from the repository root:
+    python -m pytest tests
+"""
+import json
+import unittest
+
+import pandas as pd
+
+from backend.endpoint_helper import QZeroClient, build_feature_frame, format_hours
+from backend.stream_parser import parse_bulk_policies
+from backend.stub_server import build_response
+
+
+CHUNK_SIZES = [1, 7, 64, 1 << 10, 1 << 16, 10_000_000]
+
+
+class FakeResponse:
+    """
+    Stands in for a buffered requests.Response.
+    """
+
+    def __init__(self, body: bytes):
+        self.body = body
+
+    def json(self) -> dict:
+        return json.loads(self.body)
+
+
+def make_body(hours: list, features: list) -> bytes:
+    payload = {"json": json.dumps([{"index": hours, "features": features}, {"index": hours[:5], "features": features[:1]}])}
+    return json.dumps(build_response(payload)).encode()
+
+
+def stream_frames(body: bytes, chunk_size: int) -> list:
+    chunks = (body[start : start + chunk_size] for start in range(0, len(body), chunk_size))
+    return [build_feature_frame(*parsed) for parsed in parse_bulk_policies(chunks, [48, 5])]
+
+
+class StreamParserTest(unittest.TestCase):
+    def assert_matches_parse_response(self, body: bytes):
+        expected = QZeroClient(base_url="http://localhost").parse_response(FakeResponse(body))
+        for chunk_size in CHUNK_SIZES:
+            with self.subTest(chunk_size=chunk_size):
+                actual = stream_frames(body, chunk_size)
+                self.assertEqual(len(actual), len(expected))
+                for actual_df, expected_df in zip(actual, expected):
+                    pd.testing.assert_frame_equal(actual_df, expected_df)
+
+    def test_chunk_sizes(self):
+        hours = format_hours(pd.Timestamp("2024-12-15"), pd.Timestamp("2024-12-16 23:00"))
+        self.assert_matches_parse_response(make_body(hours, ["pjm_load_total_mw", "miso_load_total_mw", 'a "quoted" name']))
+
+    def test_long_timestamps(self):
+        # Longer than the initial buffer width, so the buffer has to grow instead of cutting off the ":30"
+        hours = [f"2024-12-15T{hour:02d}:00:00.000000000+05:30" for hour in range(24)]
+        hours += [f"2024-12-16T{hour:02d}:00:00.123456789+05:30" for hour in range(24)]
+        self.assert_matches_parse_response(make_body(hours, ["pjm_load_total_mw"]))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,92 @@
+import io
+import os
+import tempfile
+
+try:
+    # Dash's DiskcacheManager runs background callbacks in worker processes (it also needs multiprocess and psutil)
+    import diskcache
+    from dash import DiskcacheManager
+except ImportError:
+    diskcache = None
+
+# Directory where the queued background jobs and their progress and results are kept
+BACKGROUND_CACHE_DIR = os.environ.get(
+    "DASHBOARD_BACKGROUND_CACHE_DIR", os.path.join(tempfile.gettempdir(), "model_analysis_dashboard_jobs")
+)
+
+# Rows written per step of a CSV export, i.e. how often its progress is reported
+EXPORT_CHUNK_ROWS = 50_000
+
+
+def background_callback_manager(cache_dir=BACKGROUND_CACHE_DIR):
+    """
+    This function builds the manager that runs the app's background callbacks.
+
+    Parameters:
+    cache_dir (str, optional): Directory of the job queue. Defaults to BACKGROUND_CACHE_DIR.
+
+    Returns:
+    dash.DiskcacheManager: The manager, or None when diskcache is not installed.
+    """
+    if diskcache is None:
+        return None
+    return DiskcacheManager(diskcache.Cache(cache_dir))
+
+
+def heavy_callback(app, *dependencies, progress=None, running=None, cancel=None, **callback_options):
+    """
+    This function registers a callback doing heavy work (long fetches, curve fits, exports).
+
+    When the app has a background callback manager, the callback becomes a Dash background callback: it runs
+    in a worker process so request threads stay free for cheap interactions, reports its progress through
+    `progress` and is cancelled when an input of `cancel` changes while it runs. Without a manager it is
+    registered as a regular callback and its progress reports are dropped.
+
+    The decorated function always receives a set_progress function as its first argument. It runs in another
+    process, so it must get all its data through its Inputs and States, never from module state such as the
+    session store, which is empty (or copied mid-change) in that process.
+
+    Parameters:
+    app (dash.Dash): The app to register the callback on.
+    *dependencies: The Outputs, Inputs and States of the callback.
+    progress (list, optional): Outputs set_progress writes to.
+    running (list, optional): (Output, value while running, value when done) tuples.
+    cancel (list, optional): Inputs that cancel a running job when they change.
+    **callback_options: Other app.callback arguments, e.g. prevent_initial_call.
+
+    Returns:
+    function: The decorator.
+    """
+    def decorator(function):
+        if app._background_manager is not None:
+            return app.callback(
+                *dependencies, background=True, progress=progress, running=running, cancel=cancel, **callback_options
+            )(function)
+
+        def run_inline(*args):
+            return function(lambda progress_values: None, *args)
+
+        run_inline.__name__ = function.__name__
+        return app.callback(*dependencies, running=running, **callback_options)(run_inline)
+
+    return decorator
+
+
+def csv_with_progress(df, set_progress, chunk_rows=EXPORT_CHUNK_ROWS):
+    """
+    This function writes a DataFrame as CSV in chunks, reporting the percentage written after each chunk.
+
+    Parameters:
+    df (pandas.DataFrame): The rows to export.
+    set_progress (callable): Called with the percentage written so far, e.g. "40%".
+    chunk_rows (int, optional): Rows written per chunk. Defaults to EXPORT_CHUNK_ROWS.
+
+    Returns:
+    str: The CSV text, without the index.
+    """
+    buffer = io.StringIO()
+    for start in range(0, max(len(df), 1), chunk_rows):
+        df.iloc[start : start + chunk_rows].to_csv(buffer, index=False, header=start == 0, encoding="utf-8")
+        written = min(start + chunk_rows, len(df))
+        set_progress(f"{written * 100 // len(df) if len(df) else 100}%")
+    return buffer.getvalue()
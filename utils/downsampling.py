@@ -0,0 +1,135 @@
+import numpy as np
+import pandas as pd
+
+# Width in pixels assumed for a graph until the browser reports the real one
+DEFAULT_GRAPH_WIDTH = 1200
+
+
+def min_max_positions(values, n_buckets):
+    """
+    This function returns the rows holding the minimum and the maximum of each bucket of a series.
+
+    The rows are split into `n_buckets` contiguous buckets of (almost) equal size; missing values are ignored
+    unless a whole bucket is missing, in which case its first row is kept so the gap stays visible.
+
+    Parameters:
+    values (numpy.ndarray): The series values.
+    n_buckets (int): The number of buckets, usually the graph width in pixels.
+
+    Returns:
+    numpy.ndarray: The sorted, unique row positions of every bucket's minimum and maximum.
+    """
+    n_rows = len(values)
+    edges = np.unique(np.linspace(0, n_rows, n_buckets + 1).astype(int))
+    starts = edges[:-1]
+    bucket = np.repeat(np.arange(len(starts)), np.diff(edges))
+
+    missing = np.isnan(values)
+    positions = []
+    for filled, reduce in ((np.where(missing, np.inf, values), np.minimum), (np.where(missing, -np.inf, values), np.maximum)):
+        extremes = reduce.reduceat(filled, starts)
+        # First row of each bucket that reaches the bucket's extreme
+        candidates = np.flatnonzero(filled == extremes[bucket])
+        _, first = np.unique(bucket[candidates], return_index=True)
+        positions.append(candidates[first])
+    return np.unique(np.concatenate(positions))
+
+
+def color_change_positions(colors, n_buckets=None):
+    """
+    This function returns the rows where the band colour differs from the previous row's, including row 0.
+
+    Parameters:
+    colors (list): The band colour of each row, as returned by assign_color.
+    n_buckets (int, optional): When given, only the first and last change of each of that many buckets
+                               (split as in min_max_positions) are returned, so a colour that flips almost
+                               every row does not keep every row.
+
+    Returns:
+    numpy.ndarray: The sorted row positions.
+    """
+    colors = np.asarray(colors, dtype=object)
+    changes = np.ones(len(colors), dtype=bool)
+    changes[1:] = colors[1:] != colors[:-1]
+    positions = np.flatnonzero(changes)
+    if n_buckets is None:
+        return positions
+
+    edges = np.unique(np.linspace(0, len(colors), n_buckets + 1).astype(int))
+    bucket = np.searchsorted(edges, positions, side="right") - 1
+    _, first = np.unique(bucket, return_index=True)
+    _, last_reversed = np.unique(bucket[::-1], return_index=True)
+    return np.unique(np.concatenate([positions[first], positions[len(positions) - 1 - last_reversed]]))
+
+
+def downsample_frame(df, columns, band_colors=None, width=DEFAULT_GRAPH_WIDTH):
+    """
+    This function reduces a DataFrame to about two rows per pixel of the graph it will be drawn in.
+
+    It keeps the min/max row of every bucket of each plotted column, the first and last rows, and the
+    first and last red/green sign change of every bucket, so the bands change colour at the hour they do
+    wherever the colour changes less than about once per pixel. Frames that already fit are returned unchanged.
+
+    Parameters:
+    df (pandas.DataFrame): The DataFrame to plot.
+    columns (list): The columns drawn as lines.
+    band_colors (list, optional): The band colour of each row, as returned by assign_color.
+    width (int, optional): The graph width in pixels. Defaults to DEFAULT_GRAPH_WIDTH.
+
+    Returns:
+    tuple: The downsampled DataFrame and the band colours of its rows (None if no colours were given).
+    """
+    n_buckets = max(int(width or DEFAULT_GRAPH_WIDTH), 1)
+    if len(df) <= 2 * n_buckets:
+        return df, band_colors
+
+    positions = [np.array([0, len(df) - 1])]
+    for column in columns:
+        positions.append(min_max_positions(df[column].to_numpy(dtype=float), n_buckets))
+    if band_colors is not None:
+        positions.append(color_change_positions(band_colors, n_buckets))
+    positions = np.unique(np.concatenate(positions))
+
+    if band_colors is not None:
+        band_colors = np.asarray(band_colors, dtype=object)[positions]
+    return df.iloc[positions], band_colors
+
+
+def relayout_x_range(relayout_data):
+    """
+    This function reads the x axis range a user zoomed or panned to from a dcc.Graph relayoutData event.
+
+    Parameters:
+    relayout_data (dict): The graph's relayoutData property.
+
+    Returns:
+    list: [start, end] as strings when the event set an x range, otherwise None (including autorange resets).
+    """
+    if not relayout_data:
+        return None
+    if "xaxis.range[0]" in relayout_data and "xaxis.range[1]" in relayout_data:
+        return [relayout_data["xaxis.range[0]"], relayout_data["xaxis.range[1]"]]
+    if "xaxis.range" in relayout_data:
+        return list(relayout_data["xaxis.range"])
+    return None
+
+
+def window_frame(df, x_range):
+    """
+    This function returns the rows of a DataFrame inside an x axis range, plus one row on either side so
+    the lines and bands reach the edges of the graph.
+
+    Parameters:
+    df (pandas.DataFrame): The DataFrame with a DatetimeIndex.
+    x_range (list): [start, end] as reported by the graph, in the wall time of the index.
+
+    Returns:
+    pandas.DataFrame: The visible rows.
+    """
+    start, end = (pd.Timestamp(bound) for bound in x_range)
+    if df.index.tz is not None:
+        start = start.tz_localize(df.index.tz)
+        end = end.tz_localize(df.index.tz)
+    first = max(df.index.searchsorted(start, side="left") - 1, 0)
+    last = min(df.index.searchsorted(end, side="right") + 1, len(df))
+    return df.iloc[first:last]
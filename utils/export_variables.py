@@ -1,4 +0,0 @@
-import pandas as pd
-
-export_df1 = pd.DataFrame()
-export_df2 = pd.DataFrame()
\ No newline at end of file
@@ -0,0 +1,98 @@
+import hashlib
+import json
+import os
+import pickle
+import threading
+from collections import OrderedDict
+
+import pandas as pd
+
+# Upper bound for the memory the cached figures and tables may use, overridable with FIGURE_CACHE_MAX_BYTES
+DEFAULT_MAX_BYTES = int(os.environ.get("FIGURE_CACHE_MAX_BYTES", 64 * 1024 * 1024))
+
+
+def frame_digest(df, columns):
+    """
+    This function returns a content hash of the index and some columns of a DataFrame.
+
+    Parameters:
+    df (pandas.DataFrame): The DataFrame a figure or table is built from.
+    columns (list): The columns the figure or table reads.
+
+    Returns:
+    str: A hex digest that changes whenever the index or any value of `columns` changes.
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(pd.util.hash_pandas_object(df.index, categorize=False).to_numpy().tobytes())
+    for column in columns:
+        digest.update(column.encode())
+        if column in df.columns:
+            digest.update(pd.util.hash_pandas_object(df[column], index=False, categorize=False).to_numpy().tobytes())
+    return digest.hexdigest()
+
+
+def cache_key(name, *parts):
+    """
+    This function builds a cache key from the name of the function being cached and its (JSON serializable) inputs.
+    """
+    return hashlib.blake2b(json.dumps([name, *parts], default=str).encode(), digest_size=16).hexdigest()
+
+
+class FigureCache:
+    """
+    A least recently used cache of built figures and tables, bounded by their pickled size in bytes.
+
+    Parameters:
+    max_bytes (int, optional): The total size the cached values may take. Defaults to DEFAULT_MAX_BYTES.
+    """
+
+    def __init__(self, max_bytes=DEFAULT_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()
+        self.size_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key, value):
+        size = len(pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL))
+        with self.lock:
+            if key in self.entries:
+                self.size_bytes -= self.entries.pop(key)[1]
+            # Values larger than the whole cache are returned but not kept
+            if size > self.max_bytes:
+                return
+            self.entries[key] = (value, size)
+            self.size_bytes += size
+            while self.size_bytes > self.max_bytes:
+                _, (_, evicted_size) = self.entries.popitem(last=False)
+                self.size_bytes -= evicted_size
+
+    def get_or_create(self, key, create):
+        """
+        This function returns the cached value for `key`, calling `create()` and caching its result on a miss.
+        """
+        value = self.get(key)
+        if value is None:
+            value = create()
+            self.put(key, value)
+        return value
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.size_bytes = 0
+
+
+# Shared by every callback of the app
+figure_cache = FigureCache()
@@ -1,5 +1,10 @@
+import numpy as np
 import pandas as pd
-from backend.data_setup import calculate_user_predictions
+
+# Colours of the bands: col1 above col2 (or 0), col1 below, and equal (or missing) values
+GREEN = 'rgba(0, 255, 0, 0.7)'
+RED = 'rgba(255, 0, 0, 0.7)'
+TRANSPARENT = 'rgba(0, 0, 0, 0)'
 
 def assign_color(df, col1, col2, base_zero=False):
     """
@@ -13,31 +18,21 @@ def assign_color(df, col1, col2, base_zero=False):
                                 against 0 instead of `col2`. Defaults to False.
     
     Returns:
-    list: A list of RGBA color strings ('rgba(r, g, b, a)') assigned to each row based 
-          on the comparison results.
+    numpy.ndarray: An array of RGBA color strings ('rgba(r, g, b, a)') assigned to each row based 
+                   on the comparison results.
     """
-    # Initialize an empty list to store the color values
-    colors = []
+    values = df[col1].to_numpy(dtype=float)
     
-    # Iterate through each row of the DataFrame
-    for i, row in df.iterrows():
-        
-        # Check if the value in col1 is greater than col2 (or 0 if base_zero is True)
-        if row[col1] > (0 if base_zero else row[col2]):
-            # Append a green color with some transparency if the condition is met
-            colors.append('rgba(0, 255, 0, 0.7)')
-        
-        # Check if the value in col2 (or 0 if base_zero is True) is greater than col1
-        elif (0 if base_zero else row[col2]) > row[col1]:
-            # Append a red color with some transparency if the condition is met
-            colors.append('rgba(255, 0, 0, 0.7)')
-        
-        # If neither condition is met, append a transparent color
-        else:
-            colors.append('rgba(0, 0, 0, 0)')
+    # Compare against 0 if base_zero is True, otherwise against col2
+    reference = 0.0 if base_zero else df[col2].to_numpy(dtype=float)
     
-    # Return the list of assigned colors
-    return colors
+    # Green where col1 is greater, red where it is smaller, and transparent when they are equal
+    # (or either value is missing)
+    return np.select(
+        [values > reference, reference > values],
+        [GREEN, RED],
+        default=TRANSPARENT,
+    ).astype(object)
 
 
 def parse_table_data(data, df_index):
@@ -0,0 +1,400 @@
+import contextlib
+import io
+import logging
+import os
+import pickle
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+import pandas as pd
+
+from backend.Class import Ops
+from backend.endpoint_helper import TIMEZONE
+
+logger = logging.getLogger(__name__)
+
+try:
+    import pyarrow  # noqa: F401  (lets pandas write Parquet)
+
+    FRAME_FORMAT = "parquet"
+except ImportError:
+    FRAME_FORMAT = "pickle"
+
+try:
+    import diskcache
+except ImportError:
+    diskcache = None
+
+# Directory of the cache shared by every worker process (requires diskcache); unset keeps the state per process
+SESSION_CACHE_DIR = os.environ.get("DASHBOARD_SESSION_CACHE_DIR")
+# Sessions kept deserialized in each process
+MAX_SESSIONS = int(os.environ.get("DASHBOARD_MAX_SESSIONS", 32))
+# Seconds between two checks for newly published hours; 0 turns the refresh off
+REFRESH_SECONDS = int(os.environ.get("DASHBOARD_REFRESH_SECONDS", 5 * 60))
+# Sessions unused for this long are dropped from the shared cache
+SESSION_TTL_SECONDS = 24 * 60 * 60
+
+# Ops attributes rebuilt from Ops.df and the filters after loading, so they are not serialized
+DERIVED_OPS_ATTRIBUTES = (
+    "df", "filter_mask", "filter_masks", "filter_masks_index", "calendar_index", "column_digests", "column_digests_df",
+    "scatter_statistics", "virtual_columns",
+)
+
+BASE_KEY = "ops:base"
+# Bumped in the shared cache whenever a worker writes refreshed base data, so the other workers pick it up
+BASE_VERSION_KEY = f"version:{BASE_KEY}"
+# Held by the worker that refreshes the shared base data for the current interval
+REFRESH_LEASE_KEY = f"refresh:{BASE_KEY}"
+
+
+def frame_to_bytes(df):
+    """
+    This function serializes a DataFrame, as Parquet when pyarrow is installed and as a pickle otherwise.
+    """
+    if FRAME_FORMAT == "parquet":
+        buffer = io.BytesIO()
+        df.to_parquet(buffer)
+        return buffer.getvalue()
+    return pickle.dumps(df, protocol=pickle.HIGHEST_PROTOCOL)
+
+
+def frame_from_bytes(data):
+    """
+    This function reads a DataFrame written by frame_to_bytes (the format is recognised from the bytes).
+    """
+    # Parquet files start with the "PAR1" magic number
+    if data[:4] == b"PAR1":
+        return pd.read_parquet(io.BytesIO(data))
+    return pickle.loads(data)
+
+
+def ops_to_bytes(ops):
+    """
+    This function serializes an Ops object: its loaded frame plus its settings (dates, features, filters,
+    created features and graphs). Masks and the filtered frame are left out and rebuilt on load.
+    """
+    state = {name: value for name, value in vars(ops).items() if name not in DERIVED_OPS_ATTRIBUTES}
+    return pickle.dumps({"state": state, "df": frame_to_bytes(ops.df)}, protocol=pickle.HIGHEST_PROTOCOL)
+
+
+def ops_from_bytes(data):
+    """
+    This function rebuilds an Ops object written by ops_to_bytes.
+    """
+    payload = pickle.loads(data)
+    ops = Ops()
+    vars(ops).update(payload["state"])
+    ops.df = frame_from_bytes(payload["df"])
+    ops.update_filter_mask()
+    return ops
+
+
+class SessionStore:
+    """
+    Keeps an Ops object and the exported table frames of every browser session.
+
+    Each process holds the most recently used sessions in an LRU. When a shared directory is configured (and
+    diskcache is installed) sessions are also written there, serialized compactly, so every worker process
+    sees the same state and the initial data is only fetched by the first worker that needs it.
+
+    Parameters:
+    loader (callable): Builds the Ops object new sessions start from, e.g. setup_data.
+    max_sessions (int, optional): Sessions kept in memory per process. Defaults to MAX_SESSIONS.
+    cache_dir (str, optional): Directory of the shared cache. Defaults to SESSION_CACHE_DIR.
+    """
+
+    def __init__(self, loader, max_sessions=MAX_SESSIONS, cache_dir=SESSION_CACHE_DIR):
+        self.loader = loader
+        self.max_sessions = max_sessions
+        self.sessions = OrderedDict()
+        self.lock = threading.RLock()
+        # Held while the base data is fetched, so sessions (and readiness checks) are not blocked by a load
+        self.load_lock = threading.RLock()
+        self.shared = diskcache.Cache(cache_dir) if diskcache is not None and cache_dir else None
+        self.base_bytes = None
+        self.base = None
+        # Value of BASE_VERSION_KEY that base_bytes was read or written at
+        self.base_version = None
+        self.loading_thread = None
+        # Seconds the last load of the base data took, when it finished (time.perf_counter()) and any error it raised
+        self.load_seconds = None
+        self.loaded_at = None
+        self.load_error = None
+        # Increases every time new base data is available, so browsers know to redraw
+        self.version = 0
+        self.refresh_thread = None
+        self.refresh_stop = threading.Event()
+        # Identifies this store in the shared refresh lease (see _holds_refresh_lease)
+        self.worker_id = uuid.uuid4().hex
+
+    @property
+    def ready(self):
+        """
+        Whether the base data is loaded, i.e. sessions can be served without waiting for a fetch.
+        """
+        return self.base is not None
+
+    def start_loading(self):
+        """
+        This function loads the base data on a background thread, unless it is loaded or already loading.
+        Calling it again after a failed load retries.
+
+        Returns:
+        threading.Thread: The loading thread, or None if the data is already loaded.
+        """
+        with self.lock:
+            if self.ready:
+                return None
+            if self.loading_thread is None or not self.loading_thread.is_alive():
+                self.loading_thread = threading.Thread(target=self._load, name="session-store-load", daemon=True)
+                self.loading_thread.start()
+            return self.loading_thread
+
+    def _load(self):
+        start = time.perf_counter()
+        try:
+            self.base_ops()
+        except Exception as error:
+            self.load_error = error
+            logger.exception("Loading the dashboard data failed")
+            return
+        self.loaded_at = time.perf_counter()
+        self.load_seconds = self.loaded_at - start
+        self.load_error = None
+        self.version += 1
+        logger.info("Dashboard data loaded in %.2fs", self.load_seconds)
+
+    def _base_bytes(self):
+        # Read without the load lock once loaded, so new sessions do not wait for a refresh in progress
+        data = self.base_bytes
+        if data is not None:
+            return data
+        with self.load_lock:
+            if self.base_bytes is None:
+                if self.shared is not None:
+                    # Only one worker builds the initial data; the others wait and read it
+                    with diskcache.Lock(self.shared, f"lock:{BASE_KEY}"):
+                        with self.shared.transact():
+                            data = self.shared.get(BASE_KEY)
+                            self.base_version = self.shared.get(BASE_VERSION_KEY, 0)
+                        if data is None:
+                            data = ops_to_bytes(self.loader())
+                            self.shared.set(BASE_KEY, data)
+                else:
+                    data = ops_to_bytes(self.loader())
+                self.base_bytes = data
+            return self.base_bytes
+
+    def refresh(self, end_date=None):
+        """
+        This function adds the hours published since the base data was loaded (or last refreshed) to it, and
+        bumps the version. Sessions are brought up to date the next time they are used. With a shared cache it
+        starts from the latest base data any worker wrote there, and writes its result there for the others.
+
+        Parameters:
+        end_date (str, optional): The last day to fetch. Defaults to today in the Quantum Zero timezone.
+
+        Returns:
+        int: The number of hours added or changed.
+        """
+        if not self.ready:
+            return 0
+        end_date = end_date or pd.Timestamp.now(tz=TIMEZONE).strftime("%Y-%m-%d")
+        start = time.perf_counter()
+        with self.load_lock:
+            # Start from what another worker refreshed last, if anything
+            self.read_shared_base()
+            # Sessions and refreshes read the base while this runs, so a copy of its own (rebuilt from its bytes,
+            # sharing no caches) is extended and then swapped in
+            ops = ops_from_bytes(self.base_bytes)
+            changed_hours = ops.append_new_hours(end_date)
+            if not changed_hours:
+                return 0
+            data = ops_to_bytes(ops)
+            if self.shared is not None:
+                with self.shared.transact():
+                    self.shared.set(BASE_KEY, data)
+                    self.base_version = self.shared.incr(BASE_VERSION_KEY)
+            self.base_bytes = data
+            self.base = ops
+        with self.lock:
+            self.version += 1
+        logger.info("Dashboard data refreshed in %.2fs, %d hours added or changed", time.perf_counter() - start, changed_hours)
+        return changed_hours
+
+    def read_shared_base(self):
+        """
+        This function takes the base data another worker refreshed into the shared cache, if it is newer than
+        this worker's, and bumps the version so sessions are brought up to date.
+
+        Returns:
+        bool: Whether newer base data was read.
+        """
+        if self.shared is None or not self.ready:
+            return False
+        with self.load_lock:
+            with self.shared.transact():
+                version = self.shared.get(BASE_VERSION_KEY, 0)
+                if version == self.base_version:
+                    return False
+                data = self.shared.get(BASE_KEY)
+            if data is None:
+                return False
+            self.base = ops_from_bytes(data)
+            self.base_bytes = data
+            self.base_version = version
+        with self.lock:
+            self.version += 1
+        logger.info("Read the dashboard data refreshed by another worker")
+        return True
+
+    def start_refreshing(self, interval_seconds=REFRESH_SECONDS):
+        """
+        This function calls refresh every `interval_seconds` on a background thread, unless it is already running.
+
+        Parameters:
+        interval_seconds (int, optional): Seconds between two refreshes; 0 disables them. Defaults to REFRESH_SECONDS.
+
+        Returns:
+        threading.Thread: The refreshing thread, or None if refreshing is disabled.
+        """
+        if not interval_seconds:
+            return None
+        with self.lock:
+            if self.refresh_thread is None or not self.refresh_thread.is_alive():
+                self.refresh_stop.clear()
+                self.refresh_thread = threading.Thread(
+                    target=self._refresh_periodically, args=(interval_seconds,), name="session-store-refresh", daemon=True
+                )
+                self.refresh_thread.start()
+            return self.refresh_thread
+
+    def stop_refreshing(self):
+        """
+        This function stops the thread started by start_refreshing.
+        """
+        self.refresh_stop.set()
+
+    def _refresh_periodically(self, interval_seconds):
+        while not self.refresh_stop.wait(interval_seconds):
+            try:
+                if self.shared is None:
+                    self.refresh()
+                elif self._holds_refresh_lease(interval_seconds):
+                    self.refresh()
+                    # Renewed after every refresh, so it only lapses once this worker stops refreshing
+                    self.shared.set(REFRESH_LEASE_KEY, self.worker_id, expire=2 * interval_seconds)
+                else:
+                    self.read_shared_base()
+            except Exception:
+                # Keep the data already loaded and try again at the next interval
+                logger.exception("Refreshing the dashboard data failed")
+
+    def _holds_refresh_lease(self, interval_seconds):
+        # With a shared cache only the worker holding the lease fetches new hours, and the others read its result.
+        # A worker takes the lease when no other worker has renewed it for two intervals.
+        holder = self.shared.get(REFRESH_LEASE_KEY)
+        if holder is None:
+            return self.shared.add(REFRESH_LEASE_KEY, self.worker_id, expire=2 * interval_seconds)
+        return holder == self.worker_id
+
+    def base_ops(self):
+        """
+        This function returns the Ops object new sessions start from. It is shared, so it must not be modified
+        or read through its caches (e.g. Ops.frame); sessions get their own copies.
+        """
+        with self.load_lock:
+            if self.base is None:
+                self.base = ops_from_bytes(self._base_bytes())
+            return self.base
+
+    def _session(self, session_id):
+        # The in-memory entry of a session, loading it from the shared cache or starting it from the base data.
+        # The store lock only guards the LRU; loading and syncing a session holds that session's own lock, so
+        # other sessions are served meanwhile.
+        with self.lock:
+            session = self.sessions.get(session_id)
+            if session is None:
+                session = {"lock": threading.RLock(), "ops": None, "frames": {}, "version": None}
+                self.sessions[session_id] = session
+                while len(self.sessions) > self.max_sessions:
+                    self.sessions.popitem(last=False)
+            else:
+                self.sessions.move_to_end(session_id)
+
+        with session["lock"]:
+            if session["ops"] is None:
+                version = self.version
+                data = self.shared.get(f"ops:{session_id}") if self.shared is not None else None
+                session["ops"] = ops_from_bytes(data if data is not None else self._base_bytes())
+                # Version of the base data the session's Ops was last brought up to (unknown for a shared copy)
+                session["version"] = None if data is not None else version
+            self._sync_session(session_id, session)
+        return session
+
+    def _sync_session(self, session_id, session):
+        # Adds the hours refreshed into the base data since to a session's Ops, taking them from the base frame
+        # when it holds every feature the session loaded. Called with the session's lock held.
+        version = self.version
+        base = self.base
+        if session["version"] == version or base is None:
+            return
+        ops = session["ops"]
+        fetched_df = base.df if all(feature in base.df.columns for feature in ops.loaded_features) else None
+        if ops.append_new_hours(base.loaded_end_date, fetched_df) and self.shared is not None:
+            self.shared.set(f"ops:{session_id}", ops_to_bytes(ops), expire=SESSION_TTL_SECONDS)
+        session["version"] = version
+
+    @contextlib.contextmanager
+    def use_ops(self, session_id):
+        """
+        This function gives access to the Ops object of a session while holding the session's lock, so neither
+        the hours a refresh merges into it nor another request of the same session change it meanwhile:
+
+            with session_store.use_ops(session_id) as ops:
+                df = ops.frame(columns)
+
+        Read what is needed (or change it and call save_ops) inside the block; the object must not be used
+        after it. Requests without a session id share one session of their own, so the base data is never
+        handed out (reading an Ops fills its caches).
+        """
+        session = self._session(session_id)
+        with session["lock"]:
+            # A refresh merged after _session released the lock is added now, before the caller reads the Ops
+            self._sync_session(session_id, session)
+            yield session["ops"]
+
+    def save_ops(self, session_id, ops):
+        """
+        This function records a session's Ops object after it was changed, so the other workers see the change.
+        """
+        session = self._session(session_id)
+        with session["lock"]:
+            session["ops"] = ops
+        if self.shared is not None:
+            self.shared.set(f"ops:{session_id}", ops_to_bytes(ops), expire=SESSION_TTL_SECONDS)
+
+    def put_frame(self, session_id, name, df):
+        """
+        This function stores a frame of a session, e.g. the rows of a table for the export.
+        """
+        session = self._session(session_id)
+        with session["lock"]:
+            session["frames"][name] = df
+        if self.shared is not None:
+            self.shared.set(f"frame:{session_id}:{name}", frame_to_bytes(df), expire=SESSION_TTL_SECONDS)
+
+    def get_frame(self, session_id, name):
+        """
+        This function returns a frame stored with put_frame, or None if the session has none by that name.
+        """
+        session = self._session(session_id)
+        with session["lock"]:
+            df = session["frames"].get(name)
+        if df is None and self.shared is not None:
+            data = self.shared.get(f"frame:{session_id}:{name}")
+            if data is not None:
+                df = frame_from_bytes(data)
+        return df